@@ -0,0 +1,173 @@
+"""
+Procesamiento IA en tres etapas: lector -> modelo -> escritor
+Las etapas se comunican con colas acotadas, de modo que la lectura y escritura
+en MySQL se solapan con la codificación; cada etapa lleva su propio contador.
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import text
+
+_DONE = object()
+
+
+class StageCounter:
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy = 0.0
+
+    def add(self, items: int, seconds: float):
+        self.items += items
+        self.batches += 1
+        self.busy += seconds
+
+    def __str__(self):
+        rate = self.items / self.busy if self.busy else 0.0
+        return f"{self.name}: {self.items} papers / {self.batches} lotes en {self.busy:.1f}s ({rate:.1f} papers/s)"
+
+
+class AIProcessingPipeline:
+    def __init__(self, pipeline, db=None, batch_size: int = 64, queue_size: int = 4):
+        self.pipeline = pipeline
+        self.db = db or pipeline.db
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+        self.counters = {name: StageCounter(name) for name in ('lector', 'modelo', 'escritor')}
+        self._stop = threading.Event()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def read(self, out: queue.Queue, limit: Optional[int]):
+        """Etapa 1: papers pendientes en lotes (cursor del servidor)"""
+        session = self.db.get_session()
+        try:
+            query = text("""
+                SELECT p.id_paper, p.title, p.abstract, p.methods_section,
+                       p.results_section, p.conclusions_section
+                FROM PAPER p
+                LEFT JOIN AI_SUMMARY ai ON p.id_paper = ai.id_paper
+                WHERE ai.id_paper IS NULL AND p.abstract IS NOT NULL
+                LIMIT :limit
+            """).execution_options(stream_results=True)
+            result = session.execute(query, {'limit': limit or 1000})
+
+            while True:
+                start = time.perf_counter()
+                rows = result.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                batch = [dict(row._mapping) for row in rows]
+                self.counters['lector'].add(len(batch), time.perf_counter() - start)
+                if not self._put(out, batch):
+                    break
+        except Exception as e:
+            logger.error(f"Error leyendo papers: {e}")
+        finally:
+            session.close()
+            self._put(out, _DONE)
+
+    def process(self, papers: queue.Queue, out: queue.Queue):
+        """Etapa 2: resúmenes, keywords y embeddings por lotes"""
+        try:
+            while True:
+                batch = self._get(papers)
+                if batch is _DONE:
+                    break
+
+                start = time.perf_counter()
+                try:
+                    results = self.pipeline.process_papers_batch(batch, batch_size=self.batch_size)
+                except Exception as e:
+                    logger.warning(f"Error en lote de {len(batch)} papers: {e}")
+                    continue
+                self.counters['modelo'].add(len(results), time.perf_counter() - start)
+
+                if not self._put(out, results):
+                    break
+        finally:
+            self._put(out, _DONE)
+
+    def _write_batch(self, results: List[Dict]) -> int:
+        links = [
+            (result['id_paper'], keyword, result.get('keyword_scores', {}).get(keyword, 1.0))
+            for result in results for keyword in result.get('keywords', [])
+        ]
+        self.db.bulk_insert_ai_summaries(results)
+        self.db.bulk_link_paper_keywords(links)
+        return len(results)
+
+    def write(self, results_queue: queue.Queue, written: List[int]):
+        """Etapa 3: inserciones en bloque; si un lote falla se reintenta paper a paper"""
+        try:
+            while True:
+                results = self._get(results_queue)
+                if results is _DONE:
+                    break
+
+                start = time.perf_counter()
+                try:
+                    count = self._write_batch(results)
+                except Exception as e:
+                    logger.warning(f"Error en escritura por lotes, reintentando por paper: {e}")
+                    count = 0
+                    for result in results:
+                        try:
+                            count += self._write_batch([result])
+                        except Exception as e:
+                            logger.warning(f"Error en {result['id_paper']}: {e}")
+                self.counters['escritor'].add(count, time.perf_counter() - start)
+
+                written[0] += count
+                logger.info(f"IA: {written[0]} papers guardados")
+        except Exception as e:
+            logger.error(f"Escritor detenido: {e}")
+        finally:
+            # Sin escritor nadie vacía la cola: liberar a las demás etapas
+            self._stop.set()
+
+    def run(self, limit: Optional[int] = None) -> int:
+        papers = queue.Queue(maxsize=self.queue_size)
+        results = queue.Queue(maxsize=self.queue_size)
+        written = [0]
+
+        reader = threading.Thread(target=self.read, args=(papers, limit), name='ai-reader', daemon=True)
+        writer = threading.Thread(target=self.write, args=(results, written), name='ai-writer', daemon=True)
+
+        start = time.perf_counter()
+        reader.start()
+        writer.start()
+        try:
+            self.process(papers, results)
+            writer.join()
+        finally:
+            self._stop.set()
+            reader.join()
+            writer.join()
+
+        elapsed = time.perf_counter() - start
+        for counter in self.counters.values():
+            logger.info(str(counter))
+        logger.info(f"Total: {written[0]} papers en {elapsed:.1f}s")
+        return written[0]
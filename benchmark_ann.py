@@ -0,0 +1,106 @@
+"""
+Benchmark de índices aproximados (IVF-Flat, IVF-PQ, HNSW) contra IndexFlatL2
+Reporta tiempo de construcción, memoria, latencia de consulta y recall@10
+"""
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from vector_index import build_index, train_index, set_search_params, INDEX_TYPES
+
+
+def load_vectors(synthetic, dimension, from_db):
+    if from_db:
+        from mysql_database import MySQLManager
+
+        db = MySQLManager()
+        paper_ids, embeddings = db.get_embeddings()
+        db.close()
+        if synthetic and synthetic > len(embeddings):
+            # Ampliar el corpus real con ruido alrededor de los embeddings guardados
+            rng = np.random.default_rng(0)
+            base = embeddings[rng.integers(0, len(embeddings), synthetic - len(embeddings))]
+            noise = rng.normal(scale=0.05, size=base.shape).astype('float32')
+            embeddings = np.vstack([embeddings, base + noise])
+        return np.ascontiguousarray(embeddings, dtype='float32')
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(256, dimension)).astype('float32')
+    assignment = rng.integers(0, len(centers), synthetic)
+    vectors = centers[assignment] + rng.normal(scale=0.5, size=(synthetic, dimension)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def recall_at_k(found, truth, k):
+    hits = sum(len(np.intersect1d(f[:k], t[:k])) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def bench_index(index_type, vectors, queries, truth, k, nprobe, ef_search):
+    ids = np.arange(len(vectors), dtype='int64')
+
+    start = time.perf_counter()
+    index = build_index(index_type, vectors.shape[1], len(vectors))
+    train_index(index, vectors)
+    index.add_with_ids(vectors, ids)
+    build_time = time.perf_counter() - start
+
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+    memory_mb = faiss.serialize_index(index).nbytes / 1e6
+
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query[None, :], k)
+    single_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    start = time.perf_counter()
+    _, found = index.search(queries, k)
+    batch_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    return {
+        'type': index_type,
+        'build_s': build_time,
+        'memory_mb': memory_mb,
+        'latency_ms': single_ms,
+        'batch_latency_ms': batch_ms,
+        'recall@10': recall_at_k(found, truth, k),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de índices ANN')
+    parser.add_argument('--from-db', action='store_true', help='Usar embeddings guardados en AI_SUMMARY')
+    parser.add_argument('--synthetic', type=int, default=100_000, help='Número de vectores')
+    parser.add_argument('--dimension', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, default=16)
+    parser.add_argument('--ef-search', type=int, default=64)
+    parser.add_argument('--types', nargs='+', choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.synthetic, args.dimension, args.from_db)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)]
+    queries = queries + rng.normal(scale=0.01, size=queries.shape).astype('float32')
+    queries = np.ascontiguousarray(queries, dtype='float32')
+
+    print(f"Vectores: {len(vectors)} x {vectors.shape[1]} | Consultas: {len(queries)}")
+
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    _, truth = flat.search(queries, args.k)
+
+    print(f"{'tipo':>10s} {'build(s)':>9s} {'mem(MB)':>9s} {'lat(ms)':>9s} {'lote(ms)':>9s} {'recall@10':>10s}")
+    for index_type in args.types:
+        r = bench_index(index_type, vectors, queries, truth, args.k, args.nprobe, args.ef_search)
+        print(f"{r['type']:>10s} {r['build_s']:9.2f} {r['memory_mb']:9.1f} "
+              f"{r['latency_ms']:9.3f} {r['batch_latency_ms']:9.3f} {r['recall@10']:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
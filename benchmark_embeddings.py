@@ -0,0 +1,71 @@
+"""
+Benchmark de codificación por lotes (papers/segundo en CPU)
+Compara CompletePipeline.encode_texts con distintos tamaños de lote
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+
+def load_texts(csv_path, limit, from_db):
+    """Textos título+abstract desde la BD o títulos del CSV"""
+    if from_db:
+        from mysql_database import MySQLManager
+
+        db = MySQLManager()
+        papers = db.get_all_papers(limit=limit)
+        db.close()
+        return [f"{p.get('title') or ''} {p.get('abstract') or ''}" for p in papers]
+
+    df = pd.read_csv(csv_path)
+    titles = df['Title'].dropna().astype(str).tolist()
+    return titles[:limit]
+
+
+def run_benchmark(texts, batch_sizes, repeats=2):
+    from sentence_transformers import SentenceTransformer
+    from process_ingest import CompletePipeline
+
+    # solo se necesita el modelo, sin conexión a MySQL
+    pipeline = CompletePipeline.__new__(CompletePipeline)
+    pipeline.embedding_model = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+
+    # calentamiento
+    pipeline.encode_texts(texts[:32], batch_size=32)
+
+    start = time.perf_counter()
+    for text in texts:
+        pipeline.generate_embeddings(text)
+    baseline = len(texts) / (time.perf_counter() - start)
+    print(f"{'uno a uno':>12s}: {baseline:8.1f} papers/s")
+
+    results = {'single': baseline}
+    for batch_size in batch_sizes:
+        best = 0.0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            pipeline.encode_texts(texts, batch_size=batch_size)
+            best = max(best, len(texts) / (time.perf_counter() - start))
+        results[batch_size] = best
+        print(f"{'batch ' + str(batch_size):>12s}: {best:8.1f} papers/s  (x{best / baseline:.1f})")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de embeddings por lotes')
+    parser.add_argument('--csv', default='SB_publications.csv')
+    parser.add_argument('--limit', type=int, default=600)
+    parser.add_argument('--from-db', action='store_true', help='Usar título+abstract desde MySQL')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[8, 16, 32, 64, 128])
+    args = parser.parse_args()
+
+    texts = load_texts(args.csv, args.limit, args.from_db)
+    print(f"Textos: {len(texts)}")
+    run_benchmark(texts, args.batch_sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark de latencia de búsqueda híbrida (BM25 + vectorial + RRF)
+Corpus sintético de 10k / 100k documentos con vocabulario tipo Zipf
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from hybrid_search import BM25Index, reciprocal_rank_fusion
+from vector_index import VectorIndexManager, choose_index_type
+
+
+def synthetic_corpus(n_docs, vocab_size=50_000, doc_length=200, seed=0):
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"term{i}" for i in range(vocab_size)])
+    ranks = np.arange(1, vocab_size + 1)
+    probs = (1 / ranks) / (1 / ranks).sum()
+    for paper_id in range(1, n_docs + 1):
+        words = vocab[rng.choice(vocab_size, doc_length, p=probs)]
+        yield paper_id, {
+            'title': ' '.join(words[:12]),
+            'abstract': ' '.join(words[12:]),
+        }
+
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1000
+    return np.percentile(samples, 50), np.percentile(samples, 95)
+
+
+def run(n_docs, n_queries, dimension, k):
+    bm25 = BM25Index()
+    start = time.perf_counter()
+    for paper_id, paper in synthetic_corpus(n_docs):
+        bm25.add_paper(paper_id, paper)
+    build_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(n_docs, dimension)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    vector_index = VectorIndexManager(index_path='outputs/benchmark_faiss.bin', dimension=dimension)
+    vector_index.rebuild(np.arange(1, n_docs + 1), vectors, index_type=choose_index_type(n_docs))
+
+    queries = [' '.join(f"term{i}" for i in rng.integers(10, 5000, 3)) for _ in range(n_queries)]
+    query_vectors = vectors[rng.integers(0, n_docs, n_queries)]
+
+    bm25_times, hybrid_times = [], []
+    for query, query_vector in zip(queries, query_vectors):
+        start = time.perf_counter()
+        lexical, _ = bm25.search(query, 100)
+        bm25_times.append(time.perf_counter() - start)
+
+        _, ids = vector_index.search(query_vector, 100)
+        reciprocal_rank_fusion([lexical, ids[0].tolist()])[:k]
+        hybrid_times.append(time.perf_counter() - start)
+
+    # Actualización incremental
+    start = time.perf_counter()
+    for paper_id, paper in synthetic_corpus(100, seed=2):
+        bm25.add_paper(n_docs + paper_id, paper)
+    update_ms = (time.perf_counter() - start) / 100 * 1000
+
+    bm25_p50, bm25_p95 = percentiles(bm25_times)
+    hybrid_p50, hybrid_p95 = percentiles(hybrid_times)
+    print(f"{n_docs:>8d} docs | build {build_s:6.1f}s | insert {update_ms:6.2f}ms | "
+          f"BM25 p50 {bm25_p50:6.2f}ms p95 {bm25_p95:6.2f}ms | "
+          f"híbrido p50 {hybrid_p50:6.2f}ms p95 {hybrid_p95:6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de búsqueda híbrida')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--dimension', type=int, default=384)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    for n_docs in args.sizes:
+        run(n_docs, args.queries, args.dimension, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark de extracción de keywords: búsqueda ingenua (term in text) vs Aho-Corasick
+Vocabulario real + términos sintéticos hasta 10k / 50k entradas
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from keyword_matcher import KeywordMatcher, load_vocabulary
+
+
+def synthetic_vocabulary(n_terms, base, seed=0):
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(20_000)]
+    vocabulary = {term: list(synonyms) for term, synonyms in base.items()}
+    while len(vocabulary) < n_terms:
+        n_words = int(rng.integers(1, 4))
+        term = ' '.join(words[i] for i in rng.integers(0, len(words), n_words))
+        vocabulary.setdefault(term, [f"{term}s"])
+    return vocabulary
+
+
+def synthetic_papers(n_papers, vocabulary, doc_length=400, seed=1):
+    rng = np.random.default_rng(seed)
+    terms = list(vocabulary)
+    papers = []
+    for _ in range(n_papers):
+        words = [f"w{i}" for i in rng.integers(0, 40_000, doc_length)]
+        for position in rng.integers(0, doc_length, 20):
+            words[position] = terms[int(rng.integers(0, len(terms)))]
+        papers.append((' '.join(words[:15]), ' '.join(words[15:])))
+    return papers
+
+
+def naive_keywords(vocabulary, title, abstract):
+    text_lower = f"{title} {abstract}".lower()
+    found = []
+    for term, synonyms in vocabulary.items():
+        if any(pattern.lower() in text_lower for pattern in (term, *synonyms)):
+            found.append(term)
+    return found
+
+
+def run(n_terms, n_papers, naive_papers):
+    vocabulary = synthetic_vocabulary(n_terms, load_vocabulary())
+    papers = synthetic_papers(n_papers, vocabulary)
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(vocabulary)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for title, abstract in papers:
+        matcher.keywords(title, abstract)
+    matcher_ms = (time.perf_counter() - start) / len(papers) * 1000
+
+    start = time.perf_counter()
+    for title, abstract in papers[:naive_papers]:
+        naive_keywords(vocabulary, title, abstract)
+    naive_ms = (time.perf_counter() - start) / naive_papers * 1000
+
+    print(f"{len(vocabulary):>7d} términos ({matcher.n_patterns} patrones) | build {build_s:5.2f}s | "
+          f"Aho-Corasick {matcher_ms:6.2f}ms/paper | ingenuo {naive_ms:8.2f}ms/paper | "
+          f"x{naive_ms / matcher_ms:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del matcher de keywords')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 50_000])
+    parser.add_argument('--papers', type=int, default=1000)
+    parser.add_argument('--naive-papers', type=int, default=50)
+    args = parser.parse_args()
+
+    for n_terms in args.sizes:
+        run(n_terms, args.papers, args.naive_papers)
+
+
+if __name__ == "__main__":
+    main()
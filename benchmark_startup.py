@@ -0,0 +1,69 @@
+"""
+Benchmark de tiempo de arranque (python -X importtime)
+Falla si importar el módulo supera el presupuesto indicado.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_times(module):
+    """(self_us, cumulative_us, depth, nombre) de cada import"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Presupuesto de tiempo de import')
+    parser.add_argument('modules', nargs='*', default=['main'])
+    parser.add_argument('--budget-ms', type=float, default=500)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--forbid', nargs='*', default=[
+        'sentence_transformers', 'torch', 'nltk', 'networkx', 'pyvis', 'faiss', 'pandas'
+    ], help='Paquetes que no deben importarse al arrancar')
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        entries = import_times(module)
+        end = max(i for i, e in enumerate(entries) if e[3] == module and e[2] == 0)
+        start = end
+        while start > 0 and entries[start - 1][2] > 0:
+            start -= 1
+        subtree = entries[start:end]
+
+        total_ms = entries[end][1] / 1000
+        loaded = {name.split('.')[0] for _, _, _, name in subtree}
+        forbidden = sorted(loaded.intersection(args.forbid))
+
+        print(f"{module}: {total_ms:.0f} ms (presupuesto {args.budget_ms:.0f} ms)")
+        top = sorted((e for e in subtree if e[2] == 1), key=lambda e: e[1], reverse=True)
+        for _, cumulative_us, _, name in top[:args.top]:
+            print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+
+        if forbidden:
+            print(f"   importados al arrancar: {', '.join(forbidden)}")
+        if total_ms > args.budget_ms or forbidden:
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark de escalado del pool de embeddings (1 a N procesos)
+"""
+
+import argparse
+import os
+import time
+
+from benchmark_embeddings import load_texts
+from embedding_workers import EmbeddingWorkerPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Escalado de workers de embeddings')
+    parser.add_argument('--csv', default='SB_publications.csv')
+    parser.add_argument('--limit', type=int, default=600)
+    parser.add_argument('--from-db', action='store_true', help='Usar título+abstract desde MySQL')
+    parser.add_argument('--repeat', type=int, default=4, help='Replicar los textos para alargar la prueba')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    texts = load_texts(args.csv, args.limit, args.from_db) * args.repeat
+    print(f"Textos: {len(texts)} | CPUs: {os.cpu_count()}")
+
+    workers = [1]
+    while workers[-1] * 2 <= args.max_workers:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != args.max_workers:
+        workers.append(args.max_workers)
+
+    baseline = None
+    for n in workers:
+        with EmbeddingWorkerPool(n) as pool:
+            pool.warmup()
+            start = time.perf_counter()
+            pool.encode(texts, batch_size=args.batch_size)
+            rate = len(texts) / (time.perf_counter() - start)
+
+        baseline = baseline or rate
+        print(f"{n:>3d} workers x {pool.threads_per_worker} hilos: "
+              f"{rate:8.1f} papers/s  (x{rate / baseline:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Verificación de precisión del backend ONNX int8 frente a PyTorch fp32
+Sobre una muestra de papers guardados: coseno por paper, diferencia en las
+similitudes par a par y solapamiento de vecinos top-10.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from encoder_backends import DEFAULT_ONNX_DIR, load_encoder
+from mysql_database import MySQLManager
+
+
+def timed_encode(encoder, texts, batch_size):
+    start = time.perf_counter()
+    embeddings = encoder.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    return np.asarray(embeddings, dtype=np.float32), time.perf_counter() - start
+
+
+def normalize(matrix):
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+def topk_overlap(a_sims, b_sims, k):
+    np.fill_diagonal(a_sims, -np.inf)
+    np.fill_diagonal(b_sims, -np.inf)
+    a_top = np.argsort(-a_sims, axis=1)[:, :k]
+    b_top = np.argsort(-b_sims, axis=1)[:, :k]
+    return np.mean([len(np.intersect1d(x, y)) / k for x, y in zip(a_top, b_top)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precisión ONNX int8 vs PyTorch')
+    parser.add_argument('--sample', type=int, default=300)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--onnx-dir', default=DEFAULT_ONNX_DIR)
+    parser.add_argument('--min-cosine', type=float, default=0.98)
+    args = parser.parse_args()
+
+    db = MySQLManager()
+    papers = [p for p in db.get_all_papers(limit=args.sample) if p.get('abstract')]
+    texts = [f"{p.get('title') or ''} {p.get('abstract') or ''}" for p in papers]
+    print(f"Papers de muestra: {len(texts)}")
+
+    torch_emb, torch_s = timed_encode(load_encoder('torch', device='cpu'), texts, args.batch_size)
+    onnx_emb, onnx_s = timed_encode(load_encoder('onnx', onnx_dir=args.onnx_dir), texts, args.batch_size)
+    torch_emb, onnx_emb = normalize(torch_emb), normalize(onnx_emb)
+
+    cosine = np.sum(torch_emb * onnx_emb, axis=1)
+    torch_sims = torch_emb @ torch_emb.T
+    onnx_sims = onnx_emb @ onnx_emb.T
+    sim_diff = np.abs(torch_sims - onnx_sims)
+
+    print(f"Tiempo torch fp32: {torch_s:.2f}s ({len(texts) / torch_s:.1f} papers/s)")
+    print(f"Tiempo onnx int8:  {onnx_s:.2f}s ({len(texts) / onnx_s:.1f} papers/s)  x{torch_s / onnx_s:.2f}")
+    print(f"Coseno torch-onnx: media {cosine.mean():.4f} | mín {cosine.min():.4f}")
+    print(f"Similitudes par a par: error medio {sim_diff.mean():.4f} | máx {sim_diff.max():.4f}")
+    print(f"Solapamiento vecinos top-10: {topk_overlap(torch_sims, onnx_sims, 10):.3f}")
+
+    stored_ids, stored = db.get_embeddings([p['id_paper'] for p in papers])
+    if len(stored_ids):
+        position = {pid: i for i, pid in enumerate(p['id_paper'] for p in papers)}
+        rows = [position[pid] for pid in stored_ids.tolist()]
+        stored_cos = np.sum(normalize(stored) * onnx_emb[rows], axis=1)
+        print(f"Coseno onnx vs embeddings guardados: media {stored_cos.mean():.4f} | mín {stored_cos.min():.4f}")
+
+    if cosine.min() < args.min_cosine:
+        raise SystemExit(f"Coseno mínimo por debajo de {args.min_cosine}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Embeddings de fragmentos de texto completo
+Divide results/methods/conclusions (o full_text si no hay secciones) en
+ventanas solapadas de tokens, las codifica por lotes con memoria acotada y
+las guarda en un índice FAISS a nivel de fragmento: id_chunk -> (paper, sección, offset).
+"""
+
+import re
+from typing import Dict, Iterator, List, Tuple
+
+from loguru import logger
+from sqlalchemy import bindparam, text
+
+from vector_index import VectorIndexManager
+
+SECTIONS = ('abstract', 'results', 'methods', 'conclusions', 'full_text')
+SECTION_COLUMNS = {
+    'results': 'results_section',
+    'methods': 'methods_section',
+    'conclusions': 'conclusions_section',
+    'full_text': 'full_text',
+}
+
+# id_chunk = id_paper << 20 | sección << 16 | número de fragmento
+_SECTION_BITS = 16
+_PAPER_BITS = 20
+
+_WORD = re.compile(r'\S+')
+
+
+def make_chunk_id(paper_id: int, section: str, chunk_no: int) -> int:
+    return (paper_id << _PAPER_BITS) | (SECTIONS.index(section) << _SECTION_BITS) | chunk_no
+
+
+def split_chunk_id(chunk_id: int) -> Tuple[int, str, int]:
+    paper_id = chunk_id >> _PAPER_BITS
+    section = SECTIONS[(chunk_id >> _SECTION_BITS) & 0xF]
+    return paper_id, section, chunk_id & 0xFFFF
+
+
+def iter_chunks(content: str, window: int = 180, overlap: int = 40) -> Iterator[Tuple[int, int]]:
+    """
+    Ventanas solapadas de `window` palabras (~256 tokens de MiniLM).
+    Recorre el texto de forma incremental y devuelve (inicio, fin) en caracteres.
+    """
+    step = max(1, window - overlap)
+    starts, ends = [], []
+    emitted = 0
+
+    for match in _WORD.finditer(content or ''):
+        starts.append(match.start())
+        ends.append(match.end())
+        if len(starts) == window:
+            yield starts[0], ends[-1]
+            emitted += 1
+            del starts[:step], ends[:step]
+
+    if starts and (emitted == 0 or len(starts) > overlap):
+        yield starts[0], ends[-1]
+
+
+def paper_sections(paper: Dict) -> List[Tuple[str, str]]:
+    sections = [(name, paper.get(column)) for name, column in SECTION_COLUMNS.items()
+                if name != 'full_text' and paper.get(column)]
+    if not sections and paper.get('full_text'):
+        sections = [('full_text', paper['full_text'])]
+    return sections
+
+
+class ChunkEmbedder:
+    def __init__(self, pipeline, index_manager: VectorIndexManager = None,
+                 window: int = 180, overlap: int = 40, buffer_size: int = 512):
+        self.pipeline = pipeline
+        self.db = pipeline.db
+        self.index_manager = index_manager if index_manager is not None else VectorIndexManager(
+            "outputs/chunk_index.bin", "outputs/chunk_id_mapping.json"
+        )
+        self.window = window
+        self.overlap = overlap
+        self.buffer_size = buffer_size
+
+        self.db.ensure_chunk_table()
+
+    def _flush(self, buffer, batch_size):
+        if not buffer['ids']:
+            return 0
+        embeddings = self.pipeline.embed_texts(buffer['texts'], batch_size=batch_size)
+        self.index_manager.upsert(buffer['ids'], embeddings)
+        count = len(buffer['ids'])
+        buffer['ids'].clear()
+        buffer['texts'].clear()
+        return count
+
+    def process_papers(self, papers, batch_size: int = 64) -> int:
+        """Fragmentar y codificar papers; el buffer limita la memoria usada"""
+        buffer = {'ids': [], 'texts': []}
+        total = 0
+
+        for paper in papers:
+            paper_id = paper['id_paper']
+            self.index_manager.remove_range(paper_id << _PAPER_BITS, (paper_id + 1) << _PAPER_BITS)
+
+            rows = []
+            for section, content in paper_sections(paper):
+                for chunk_no, (start, end) in enumerate(iter_chunks(content, self.window, self.overlap)):
+                    chunk_id = make_chunk_id(paper_id, section, chunk_no)
+                    rows.append({
+                        'id_chunk': chunk_id,
+                        'id_paper': paper_id,
+                        'section': section,
+                        'char_offset': start,
+                        'char_length': end - start,
+                    })
+                    buffer['ids'].append(chunk_id)
+                    buffer['texts'].append(content[start:end])
+
+                    if len(buffer['ids']) >= self.buffer_size:
+                        total += self._flush(buffer, batch_size)
+
+            self.db.replace_paper_chunks(paper_id, rows)
+
+        total += self._flush(buffer, batch_size)
+        self.index_manager.save()
+        logger.success(f"Fragmentos indexados: {total}")
+        return total
+
+    def stream_papers(self, paper_ids: List[int] = None, fetch_size: int = 20):
+        """Leer papers con su texto completo sin cargar toda la tabla"""
+        session = self.db.get_session()
+        try:
+            condition = "WHERE p.id_paper IN :ids" if paper_ids else ""
+            query = text(f"""
+                SELECT p.id_paper, p.results_section, p.methods_section,
+                       p.conclusions_section, p.full_text
+                FROM PAPER p
+                {condition}
+            """).execution_options(stream_results=True)
+            params = {}
+            if paper_ids:
+                query = query.bindparams(bindparam('ids', expanding=True))
+                params['ids'] = list(paper_ids)
+
+            result = session.execute(query, params)
+            for rows in iter(lambda: result.fetchmany(fetch_size), []):
+                for row in rows:
+                    yield dict(row._mapping)
+        finally:
+            session.close()
+
+    def search_passages(self, query: str, k: int = 10) -> List[Dict]:
+        """Buscar pasajes (paper, sección, offset) por similitud"""
+        query_vector = self.pipeline.encode_texts([query])
+        distances, ids = self.index_manager.search(query_vector, k)
+
+        hits = [(int(i), float(1 - d / 2)) for i, d in zip(ids[0], distances[0]) if i >= 0]
+        rows = {row['id_chunk']: row for row in self.db.get_chunks_by_ids([i for i, _ in hits])}
+
+        return [{**rows[chunk_id], 'similarity': score} for chunk_id, score in hits if chunk_id in rows]
+
+
+if __name__ == "__main__":
+    import argparse
+    from process_ingest import CompletePipeline
+
+    parser = argparse.ArgumentParser(description='Indexar fragmentos de texto completo')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--query', type=str)
+    args = parser.parse_args()
+
+    embedder = ChunkEmbedder(CompletePipeline())
+    if args.query:
+        for hit in embedder.search_passages(args.query):
+            print(f"[{hit['similarity']:.3f}] paper {hit['id_paper']} ({hit['section']}): {hit['passage'][:120]}")
+    else:
+        embedder.process_papers(embedder.stream_papers(), batch_size=args.batch_size)
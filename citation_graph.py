@@ -0,0 +1,219 @@
+"""
+Grafo de citas dirigido (CSR) con métricas de centralidad en caché
+Aristas citante -> citado desde CITATION, nodos indexados por enteros.
+PageRank, grado de entrada/salida y HITS se calculan por iteración de
+potencias dispersa; al llegar aristas nuevas se parte de los vectores
+anteriores (warm start) y solo se reescriben las filas que cambiaron.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import text
+
+DEFAULT_STATE_PATH = "outputs/citation_metrics.npz"
+
+METRICS = ('pagerank', 'hub', 'authority', 'in_degree', 'out_degree')
+
+
+class CitationGraph:
+    def __init__(self, citing: np.ndarray, cited: np.ndarray):
+        from scipy import sparse
+
+        citing = np.asarray(citing, dtype=np.int64)
+        cited = np.asarray(cited, dtype=np.int64)
+        keep = citing != cited
+
+        self.node_ids = np.unique(np.concatenate([citing[keep], cited[keep]]))
+        rows = np.searchsorted(self.node_ids, citing[keep])
+        cols = np.searchsorted(self.node_ids, cited[keep])
+
+        n = len(self.node_ids)
+        # out[i, j] = 1 si i cita a j; inc = out transpuesta (quién cita a j)
+        self.out = sparse.csr_matrix((np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(n, n))
+        self.out.sum_duplicates()
+        self.out.data[:] = 1.0
+        self.inc = self.out.T.tocsr()
+
+    @classmethod
+    def from_db(cls, db, fetch_size: int = 50000) -> 'CitationGraph':
+        """Cargar pares (citante, citado) con cursor del servidor"""
+        session = db.get_session()
+        try:
+            query = text("SELECT id_paper_used_by, id_paper_used FROM CITATION").execution_options(
+                stream_results=True
+            )
+            result = session.execute(query)
+            chunks = [
+                np.fromiter((value for row in rows for value in row), dtype=np.int64,
+                            count=2 * len(rows)).reshape(-1, 2)
+                for rows in iter(lambda: result.fetchmany(fetch_size), [])
+            ]
+        finally:
+            session.close()
+
+        pairs = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+        return cls(pairs[:, 0], pairs[:, 1])
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def n_edges(self) -> int:
+        return self.out.nnz
+
+    def fingerprint(self) -> str:
+        """Huella de las aristas (para saber si el grafo cambió)"""
+        digest = hashlib.sha1(self.node_ids.tobytes())
+        digest.update(self.out.indptr.tobytes())
+        digest.update(self.out.indices.tobytes())
+        return digest.hexdigest()
+
+    def degrees(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(grado de entrada = citas recibidas, grado de salida = referencias)"""
+        return np.diff(self.inc.indptr), np.diff(self.out.indptr)
+
+    def pagerank(self, damping: float = 0.85, tol: float = 1e-10, max_iter: int = 200,
+                 start: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int]:
+        n = len(self)
+        if n == 0:
+            return np.empty(0), 0
+
+        out_degree = np.diff(self.out.indptr).astype(np.float64)
+        dangling = out_degree == 0
+        inv_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+
+        rank = start.copy() if start is not None else np.full(n, 1.0 / n)
+        rank /= rank.sum()
+        for iteration in range(1, max_iter + 1):
+            # Cada nodo reparte su rank entre los papers que cita; los colgantes, entre todos
+            updated = damping * (self.inc @ (rank * inv_degree) + rank[dangling].sum() / n) + (1 - damping) / n
+            if np.abs(updated - rank).sum() < tol:
+                return updated, iteration
+            rank = updated
+        return rank, max_iter
+
+    def hits(self, tol: float = 1e-10, max_iter: int = 200,
+             start: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, int]:
+        """(hub, authority) normalizados a suma 1"""
+        n = len(self)
+        if n == 0:
+            return np.empty(0), np.empty(0), 0
+
+        hub = start.copy() if start is not None else np.full(n, 1.0 / n)
+        authority = np.zeros(n)
+        for iteration in range(1, max_iter + 1):
+            authority = self.inc @ hub
+            authority /= max(authority.sum(), 1e-300)
+            updated = self.out @ authority
+            updated /= max(updated.sum(), 1e-300)
+            if np.abs(updated - hub).sum() < tol:
+                return updated, authority, iteration
+            hub = updated
+        return hub, authority, max_iter
+
+    def metrics(self, previous: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """Todas las métricas; `previous` (alineado a node_ids) sirve de punto de partida"""
+        previous = previous or {}
+        in_degree, out_degree = self.degrees()
+        pagerank, pr_iterations = self.pagerank(start=previous.get('pagerank'))
+        hub, authority, hits_iterations = self.hits(start=previous.get('hub'))
+        logger.info(f"PageRank: {pr_iterations} iteraciones, HITS: {hits_iterations} iteraciones")
+        return {
+            'pagerank': pagerank,
+            'hub': hub,
+            'authority': authority,
+            'in_degree': in_degree,
+            'out_degree': out_degree,
+        }
+
+
+def _align(values: np.ndarray, old_ids: np.ndarray, new_ids: np.ndarray, default: float) -> np.ndarray:
+    """Reordenar un vector de métricas a otro conjunto de nodos"""
+    aligned = np.full(len(new_ids), default, dtype=np.float64)
+    positions = np.searchsorted(old_ids, new_ids)
+    positions = np.clip(positions, 0, max(len(old_ids) - 1, 0))
+    found = (old_ids[positions] == new_ids) if len(old_ids) else np.zeros(len(new_ids), dtype=bool)
+    aligned[found] = values[positions[found]]
+    return aligned
+
+
+class CitationMetricsStore:
+    """Métricas de citas persistidas en PAPER_METRICS, refrescadas de forma incremental"""
+
+    def __init__(self, db, state_path: str = DEFAULT_STATE_PATH, change_tol: float = 1e-3):
+        self.db = db
+        self.state_path = Path(state_path)
+        self.change_tol = change_tol
+
+    def load_state(self) -> Optional[Dict]:
+        if not self.state_path.exists():
+            return None
+        with np.load(self.state_path, allow_pickle=False) as state:
+            return {key: state[key] for key in state.files}
+
+    def save_state(self, graph: CitationGraph, metrics: Dict[str, np.ndarray]):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(f".{self.state_path.stem}.tmp.npz")
+        np.savez(tmp_path, node_ids=graph.node_ids, fingerprint=np.array(graph.fingerprint()), **metrics)
+        tmp_path.replace(self.state_path)
+
+    def refresh(self, force: bool = False) -> int:
+        """Recalcular si hay aristas nuevas; devuelve cuántas filas se escribieron"""
+        graph = CitationGraph.from_db(self.db)
+        state = None if force else self.load_state()
+
+        if state is not None and str(state['fingerprint']) == graph.fingerprint():
+            logger.info("Grafo de citas sin cambios: métricas al día")
+            return 0
+
+        previous = None
+        if state is not None and len(graph):
+            n = len(graph)
+            previous = {
+                'pagerank': _align(state['pagerank'], state['node_ids'], graph.node_ids, 1.0 / n),
+                'hub': _align(state['hub'], state['node_ids'], graph.node_ids, 1.0 / n),
+            }
+
+        metrics = graph.metrics(previous)
+
+        # Solo se escriben los papers cuyas métricas cambiaron
+        changed = np.ones(len(graph), dtype=bool)
+        if state is not None:
+            changed[:] = False
+            for name in METRICS:
+                old = _align(state[name].astype(np.float64), state['node_ids'], graph.node_ids, np.nan)
+                # Cambio relativo mayor que change_tol (o paper nuevo)
+                changed |= ~(np.abs(old - metrics[name]) <= self.change_tol * np.abs(old))
+
+        rows = [
+            {'paper_id': int(graph.node_ids[i]), **{name: metrics[name][i].item() for name in METRICS}}
+            for i in np.nonzero(changed)[0]
+        ]
+        written = self.db.bulk_upsert_paper_metrics(rows)
+        self.save_state(graph, metrics)
+
+        logger.success(f"Métricas de citas: {len(graph)} papers, {graph.n_edges} citas, {written} filas actualizadas")
+        return written
+
+    def most_influential(self, metric: str = 'pagerank', limit: int = 20) -> List[Dict]:
+        return self.db.get_top_papers_by_metric(metric, limit)
+
+
+if __name__ == "__main__":
+    import argparse
+    from mysql_database import MySQLManager
+
+    parser = argparse.ArgumentParser(description='Métricas del grafo de citas')
+    parser.add_argument('--force', action='store_true', help='Recalcular desde cero')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--metric', choices=METRICS, default='pagerank')
+    args = parser.parse_args()
+
+    store = CitationMetricsStore(MySQLManager())
+    store.refresh(force=args.force)
+    for paper in store.most_influential(args.metric, args.top):
+        print(f"{paper[args.metric]:.6f}  [{paper['id_paper']}] {(paper['title'] or '')[:80]}")
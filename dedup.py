@@ -0,0 +1,273 @@
+"""
+Detección de papers casi duplicados con MinHash + LSH
+Título y abstract se normalizan (minúsculas, sin acentos ni puntuación) y se
+convierten en shingles de caracteres; las firmas MinHash se reparten en bandas
+LSH, de modo que la consulta al insertar solo compara contra los candidatos
+que comparten alguna banda (sin comparaciones O(n²)).
+
+Se mantienen dos tablas LSH: solo título (referencias sin abstract) y
+título+abstract (papers con texto completo).
+"""
+
+import pickle
+import re
+import threading
+import unicodedata
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import text
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_NON_WORD = re.compile(r'[\W_]+')
+
+VIEWS = ('title', 'full')
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Minúsculas, sin acentos ni puntuación, espacios simples"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', str(value))
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return _NON_WORD.sub(' ', value.lower()).strip()
+
+
+def shingles(value: str, size: int = 5) -> np.ndarray:
+    """Hashes (uint64) de los shingles de caracteres de un texto normalizado"""
+    if not value:
+        return np.empty(0, dtype=np.uint64)
+    if len(value) <= size:
+        grams = {value}
+    else:
+        grams = {value[i:i + size] for i in range(len(value) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class DuplicateIndex:
+    def __init__(self, num_perm: int = 128, bands: int = 32, threshold: float = 0.8,
+                 shingle_size: int = 5, abstract_chars: int = 1000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.abstract_chars = abstract_chars
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), num_perm, dtype=np.uint64)
+
+        # vista -> banda -> clave -> ids ; vista -> id -> firma
+        self._tables: Dict[str, List[Dict[bytes, set]]] = {
+            view: [defaultdict(set) for _ in range(bands)] for view in VIEWS
+        }
+        self._signatures: Dict[str, Dict[int, np.ndarray]] = {view: {} for view in VIEWS}
+        self.titles: Dict[int, str] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """Firma MinHash: mínimo de num_perm permutaciones (a·x + b) mod p"""
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0)
+
+    def signatures_for(self, title: Optional[str], abstract: Optional[str] = None) -> Dict[str, np.ndarray]:
+        title = normalize_text(title)
+        if not title:
+            return {}
+        title_hashes = shingles(title, self.shingle_size)
+        views = {'title': self.signature(title_hashes)}
+
+        abstract = normalize_text(abstract)[:self.abstract_chars]
+        if abstract:
+            full_hashes = np.union1d(title_hashes, shingles(abstract, self.shingle_size))
+            views['full'] = self.signature(full_hashes)
+        return views
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def add(self, paper_id: int, title: Optional[str], abstract: Optional[str] = None):
+        """Indexar (o reindexar) un paper"""
+        views = self.signatures_for(title, abstract)
+        if not views:
+            return
+        with self._lock:
+            self.remove(paper_id)
+            for view, signature in views.items():
+                self._signatures[view][paper_id] = signature
+                for table, key in zip(self._tables[view], self._band_keys(signature)):
+                    table[key].add(paper_id)
+            self.titles[paper_id] = title
+
+    def add_paper(self, paper_id: int, paper: Dict):
+        self.add(paper_id, paper.get('title'), paper.get('abstract'))
+
+    def remove(self, paper_id: int):
+        with self._lock:
+            for view in VIEWS:
+                signature = self._signatures[view].pop(paper_id, None)
+                if signature is None:
+                    continue
+                for table, key in zip(self._tables[view], self._band_keys(signature)):
+                    bucket = table.get(key)
+                    if bucket is not None:
+                        bucket.discard(paper_id)
+                        if not bucket:
+                            del table[key]
+            self.titles.pop(paper_id, None)
+
+    def _query_views(self, views: Dict[str, np.ndarray], exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = {}
+        with self._lock:
+            for view, signature in views.items():
+                candidates = set()
+                for table, key in zip(self._tables[view], self._band_keys(signature)):
+                    candidates.update(table.get(key, ()))
+                candidates.discard(exclude)
+
+                for candidate in candidates:
+                    # Jaccard estimado = fracción de mínimos coincidentes
+                    score = float(np.mean(self._signatures[view][candidate] == signature))
+                    if score >= self.threshold and score > scores.get(candidate, 0.0):
+                        scores[candidate] = score
+
+        return sorted(scores.items(), key=lambda item: -item[1])
+
+    def query(self, title: Optional[str], abstract: Optional[str] = None,
+              exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Candidatos a duplicado [(id_paper, similitud)] con similitud >= threshold"""
+        views = self.signatures_for(title, abstract)
+        return self._query_views(views, exclude) if views else []
+
+    def find_duplicate(self, title: Optional[str], abstract: Optional[str] = None) -> Optional[int]:
+        """id_paper del duplicado más parecido (o None)"""
+        matches = self.query(title, abstract)
+        return matches[0][0] if matches else None
+
+    def duplicate_pairs(self) -> List[Tuple[int, int, float]]:
+        """Todos los pares candidatos (a < b) a partir de los buckets LSH"""
+        pairs: Dict[Tuple[int, int], float] = {}
+        with self._lock:
+            for view in VIEWS:
+                for paper_id, signature in self._signatures[view].items():
+                    for other, score in self._query_views({view: signature}, exclude=paper_id):
+                        key = (min(paper_id, other), max(paper_id, other))
+                        pairs[key] = max(score, pairs.get(key, 0.0))
+        return [(a, b, score) for (a, b), score in sorted(pairs.items())]
+
+    def merge_report(self) -> List[Dict]:
+        """
+        Grupos de duplicados (componentes conexas de los pares candidatos).
+        El paper conservado es el de menor id_paper.
+        """
+        pairs = self.duplicate_pairs()
+        parent: Dict[int, int] = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b, _ in pairs:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        groups: Dict[int, Dict] = {}
+        for a, b, score in pairs:
+            root = find(a)
+            group = groups.setdefault(root, {'keep': root, 'duplicates': set(), 'pairs': []})
+            group['duplicates'].update({a, b} - {root})
+            group['pairs'].append((a, b, round(score, 3)))
+
+        report = []
+        for root, group in sorted(groups.items()):
+            report.append({
+                'keep': root,
+                'keep_title': self.titles.get(root),
+                'duplicates': [
+                    {'id_paper': paper_id, 'title': self.titles.get(paper_id)}
+                    for paper_id in sorted(group['duplicates'])
+                ],
+                'pairs': group['pairs'],
+            })
+        return report
+
+    def build_from_rows(self, rows: Iterable) -> int:
+        count = 0
+        for row in rows:
+            row = row if isinstance(row, dict) else row._mapping
+            self.add(row['id_paper'], row.get('title'), row.get('abstract'))
+            count += 1
+        return count
+
+    def build_from_db(self, db, batch_size: int = 2000) -> int:
+        """Indexar todos los papers de la tabla PAPER"""
+        session = db.get_session()
+        try:
+            query = text("SELECT id_paper, title, abstract FROM PAPER").execution_options(stream_results=True)
+            result = session.execute(query)
+            count = 0
+            for rows in iter(lambda: result.fetchmany(batch_size), []):
+                count += self.build_from_rows(rows)
+            logger.success(f"Índice de duplicados construido: {count} papers")
+            return count
+        finally:
+            session.close()
+
+    def attach(self, db):
+        """Mantener el índice al día con los papers insertados por `db`"""
+        db.paper_listeners.append(self.add_paper)
+
+    def save(self, path: str = "outputs/dedup_index.pkl"):
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with self._lock, open(tmp_path, 'wb') as f:
+            state = {k: v for k, v in self.__dict__.items() if k != '_lock'}
+            state['_tables'] = {view: [dict(t) for t in tables] for view, tables in self._tables.items()}
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str = "outputs/dedup_index.pkl") -> 'DuplicateIndex':
+        index = cls()
+        with open(path, 'rb') as f:
+            index.__dict__.update(pickle.load(f))
+        index._tables = {view: [defaultdict(set, t) for t in tables] for view, tables in index._tables.items()}
+        return index
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from mysql_database import MySQLManager
+
+    parser = argparse.ArgumentParser(description='Informe de papers casi duplicados')
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--output', default='outputs/duplicates_report.json')
+    args = parser.parse_args()
+
+    dedup = DuplicateIndex(threshold=args.threshold)
+    dedup.build_from_db(MySQLManager())
+    report = dedup.merge_report()
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    logger.success(f"{len(report)} grupos de duplicados -> {args.output}")
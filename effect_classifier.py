@@ -0,0 +1,209 @@
+"""
+Extracción de efectos por oración desde results/conclusions
+Cada oración se puntúa con rasgos regex compilados (una sola pasada) y con un
+clasificador de prototipo más cercano sobre embeddings; las oraciones de todo
+el lote se codifican juntas y las filas EFFECT se insertan en bloque.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import bindparam, text
+
+from paper_document import split_documents
+
+EFFECT_TYPES = ('positive', 'negative', 'neutral')
+
+# El orden importa: "no significant increase" debe contar como neutral
+_EFFECT_PATTERN = re.compile(
+    r"(?P<neutral>\bno (?:significant |statistically significant |apparent |major )?"
+    r"(?:change|difference|effect|increase|decrease|alteration)s?\b"
+    r"|\bnot (?:significantly )?(?:alter|affect|change|differ)\w*"
+    r"|\b(?:unchanged|unaltered|unaffected|comparable|similar|stable|preserved)\b)"
+    r"|(?P<negative>\b(?:decreas|reduc|impair|inhibit|damag|downregulat|down-regulat|suppress|"
+    r"declin|diminish|attenuat|atroph|degrad|deplet|lower)\w*|\bloss(?:es)? of\b)"
+    r"|(?P<positive>\b(?:increas|improv|enhanc|promot|upregulat|up-regulat|elevat|stimulat|"
+    r"induc|activat|benefi|protect|restor|higher)\w*)",
+    re.IGNORECASE
+)
+
+EFFECT_PROTOTYPES = {
+    'positive': [
+        'Spaceflight increased the expression of these genes.',
+        'The treatment improved bone density and muscle function.',
+        'Microgravity enhanced cell proliferation and growth.',
+        'The countermeasure promoted recovery and protected the tissue.',
+    ],
+    'negative': [
+        'Microgravity decreased bone mineral density.',
+        'Spaceflight impaired immune cell function.',
+        'Radiation exposure caused DNA damage and cell death.',
+        'Muscle atrophy and loss of mass were observed after flight.',
+    ],
+    'neutral': [
+        'No significant differences were observed between flight and ground control groups.',
+        'Expression levels remained unchanged after exposure.',
+        'The values were similar in both groups.',
+        'Body weight was not affected by spaceflight.',
+    ],
+}
+
+DESCRIPTION_MAX_LENGTH = 500
+
+
+def regex_features(sentences: List[str]) -> np.ndarray:
+    """Conteo de indicadores (positive, negative, neutral) por oración"""
+    column = {name: i for i, name in enumerate(EFFECT_TYPES)}
+    features = np.zeros((len(sentences), len(EFFECT_TYPES)), dtype=np.float32)
+    for row, sentence in enumerate(sentences):
+        for match in _EFFECT_PATTERN.finditer(sentence):
+            features[row, column[match.lastgroup]] += 1
+    return features
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    probs = np.exp(logits)
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+class EffectClassifier:
+    def __init__(self, pipeline, regex_weight: float = 0.5, temperature: float = 0.05,
+                 min_confidence: float = 0.6, max_per_paper: int = 10):
+        self.pipeline = pipeline
+        self.db = pipeline.db
+        self.regex_weight = regex_weight
+        self.temperature = temperature
+        self.min_confidence = min_confidence
+        self.max_per_paper = max_per_paper
+        self._prototypes = None
+
+    @property
+    def prototypes(self) -> np.ndarray:
+        """Centroide normalizado de los prototipos de cada tipo de efecto"""
+        if self._prototypes is None:
+            phrases = [phrase for name in EFFECT_TYPES for phrase in EFFECT_PROTOTYPES[name]]
+            embeddings = _normalize(np.asarray(self.pipeline.encode_texts(phrases), dtype=np.float32))
+            owners = np.repeat(np.arange(len(EFFECT_TYPES)), [len(EFFECT_PROTOTYPES[n]) for n in EFFECT_TYPES])
+            centroids = np.zeros((len(EFFECT_TYPES), embeddings.shape[1]), dtype=np.float32)
+            np.add.at(centroids, owners, embeddings)
+            self._prototypes = _normalize(centroids)
+        return self._prototypes
+
+    def classify_sentences(self, sentences: List[str], batch_size: int = 128) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(índice de tipo, confianza, tiene indicadores) para todas las oraciones a la vez"""
+        features = regex_features(sentences)
+        hits = features.sum(axis=1)
+        # Sin indicadores el voto regex es uniforme
+        regex_probs = (features + 0.5) / (hits[:, None] + 0.5 * len(EFFECT_TYPES))
+
+        embeddings = _normalize(np.asarray(self.pipeline.encode_texts(sentences, batch_size=batch_size),
+                                           dtype=np.float32))
+        prototype_probs = _softmax(embeddings @ self.prototypes.T / self.temperature)
+
+        probs = self.regex_weight * regex_probs + (1 - self.regex_weight) * prototype_probs
+        labels = probs.argmax(axis=1)
+        return labels, probs[np.arange(len(labels)), labels], hits > 0
+
+    def extract(self, papers: List[Dict], batch_size: int = 128) -> List[Dict]:
+        """Filas EFFECT por oración; sin results/conclusions se usa el abstract"""
+        documents = split_documents(papers, sections=('results', 'conclusions', 'abstract'))
+
+        owners, sources, sentences = [], [], []
+        for i, document in enumerate(documents):
+            sections = [s for s in ('results', 'conclusions') if document.sentences(s)] or ['abstract']
+            for section in sections:
+                for sentence in document.sentences(section):
+                    owners.append(i)
+                    sources.append(section)
+                    sentences.append(sentence)
+
+        if not sentences:
+            return []
+
+        labels, confidence, has_indicators = self.classify_sentences(sentences, batch_size)
+        keep = np.nonzero(has_indicators & (confidence >= self.min_confidence))[0]
+
+        # Las max_per_paper oraciones más seguras de cada paper
+        owners = np.asarray(owners)
+        keep = keep[np.lexsort((-confidence[keep], owners[keep]))]
+        rows, per_paper = [], {}
+        for j in keep:
+            paper_index = int(owners[j])
+            if per_paper.get(paper_index, 0) >= self.max_per_paper:
+                continue
+            per_paper[paper_index] = per_paper.get(paper_index, 0) + 1
+            rows.append({
+                'paper_id': documents[paper_index].id_paper,
+                'effect_type': EFFECT_TYPES[labels[j]],
+                'effect_description': sentences[j][:DESCRIPTION_MAX_LENGTH],
+                'confidence_score': round(float(confidence[j]), 4),
+                'section_source': sources[j],
+            })
+        return rows
+
+    def pending_paper_ids(self, limit: Optional[int] = None) -> List[int]:
+        """Papers sin efectos ni marca de procesado (los que no dieron filas no se repiten)"""
+        self.db.ensure_effect_processed_table()
+        session = self.db.get_session()
+        try:
+            query = """
+                SELECT p.id_paper FROM PAPER p
+                LEFT JOIN EFFECT_PROCESSED ep ON p.id_paper = ep.id_paper
+                WHERE ep.id_paper IS NULL
+                  AND NOT EXISTS (SELECT 1 FROM EFFECT e WHERE e.id_paper = p.id_paper)
+                  AND (p.results_section IS NOT NULL OR p.conclusions_section IS NOT NULL
+                       OR p.abstract IS NOT NULL)
+                ORDER BY p.id_paper
+            """
+            params = {}
+            if limit:
+                query += " LIMIT :limit"
+                params['limit'] = limit
+            return [row.id_paper for row in session.execute(text(query), params)]
+        finally:
+            session.close()
+
+    def load_papers(self, paper_ids: List[int]) -> List[Dict]:
+        session = self.db.get_session()
+        try:
+            query = text("""
+                SELECT id_paper, abstract, results_section, conclusions_section
+                FROM PAPER WHERE id_paper IN :ids
+            """).bindparams(bindparam('ids', expanding=True))
+            return [dict(row._mapping) for row in session.execute(query, {'ids': paper_ids})]
+        finally:
+            session.close()
+
+    def run(self, limit: Optional[int] = None, papers_per_batch: int = 256, batch_size: int = 128) -> int:
+        """Procesar los papers sin efectos por lotes e insertar las filas en bloque"""
+        paper_ids = self.pending_paper_ids(limit)
+        if not paper_ids:
+            logger.info("No hay papers pendientes")
+            return 0
+
+        start_time = time.perf_counter()
+        total = 0
+        for start in range(0, len(paper_ids), papers_per_batch):
+            papers = self.load_papers(paper_ids[start:start + papers_per_batch])
+            rows = self.extract(papers, batch_size)
+            total += self.db.bulk_insert_effects(rows)
+
+            counts = {paper['id_paper']: 0 for paper in papers}
+            for row in rows:
+                counts[row['paper_id']] += 1
+            self.db.mark_effects_processed(counts)
+            logger.info(f"Efectos: {min(start + papers_per_batch, len(paper_ids))}/{len(paper_ids)} papers")
+
+        elapsed = time.perf_counter() - start_time
+        logger.success(
+            f"Efectos generados: {total} ({len(paper_ids) / max(elapsed, 1e-9) * 60:.0f} papers/min)"
+        )
+        return total
@@ -0,0 +1,123 @@
+"""
+Caché persistente de embeddings
+Clave: (modelo, revisión, sha256 del texto normalizado) en un almacén SQLite local
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from embedding_codec import pack_embedding, unpack_embeddings
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalizar texto antes de calcular el hash"""
+    text = unicodedata.normalize('NFC', text or '')
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = "outputs/embedding_cache.sqlite",
+                 model_name: str = 'all-MiniLM-L6-v2', revision: str = 'main'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self.revision = revision
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding (
+                model TEXT NOT NULL,
+                revision TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, revision, text_hash)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def get_many(self, hashes: List[str], chunk_size: int = 500) -> Dict[str, np.ndarray]:
+        """Buscar embeddings por hash; devuelve solo los aciertos"""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+
+        with self._lock:
+            for start in range(0, len(unique), chunk_size):
+                chunk = unique[start:start + chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embedding "
+                    f"WHERE model = ? AND revision = ? AND text_hash IN ({placeholders})",
+                    [self.model_name, self.revision, *chunk]
+                ).fetchall()
+
+                if rows:
+                    vectors = unpack_embeddings(row[1] for row in rows)
+                    for (key, _), vector in zip(rows, vectors):
+                        found[key] = vector
+
+        return found
+
+    def put_many(self, hashes: List[str], embeddings: np.ndarray):
+        """Guardar embeddings calculados"""
+        rows = [
+            (self.model_name, self.revision, key, pack_embedding(vector, model=self.model_name))
+            for key, vector in zip(hashes, embeddings)
+        ]
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embedding (model, revision, text_hash, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+    def encode(self, texts: List[str], encode_fn, dim: Optional[int] = None) -> np.ndarray:
+        """
+        Devolver embeddings de `texts` usando la caché; `encode_fn` solo
+        se llama con los textos que no están en caché.
+        """
+        hashes = [text_hash(t) for t in texts]
+        cached = self.get_many(hashes)
+
+        missing = []
+        seen = set()
+        for i, key in enumerate(hashes):
+            if key not in cached and key not in seen:
+                missing.append(i)
+                seen.add(key)
+
+        if missing:
+            computed = np.asarray(encode_fn([texts[i] for i in missing]), dtype=np.float32)
+            missing_hashes = [hashes[i] for i in missing]
+            self.put_many(missing_hashes, computed)
+            cached.update(zip(missing_hashes, computed))
+
+        if not texts:
+            return np.empty((0, dim or 0), dtype=np.float32)
+
+        return np.stack([cached[key] for key in hashes]).astype(np.float32, copy=False)
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM embedding WHERE model = ? AND revision = ?",
+                (self.model_name, self.revision)
+            ).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
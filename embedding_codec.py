@@ -0,0 +1,93 @@
+"""
+Codificación binaria de embeddings
+Formato: cabecera (magic, dtype, dim, modelo) + vector float32/float16 empaquetado
+"""
+
+import json
+import struct
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_MAGIC = b'EMB1'
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+
+# magic(4) | dtype(1) | dim(2) | len(modelo)(1)
+_HEADER = struct.Struct('<4sBHB')
+
+_DTYPE_CODES = {'float32': 1, 'float16': 2}
+_CODE_DTYPES = {1: np.dtype('<f4'), 2: np.dtype('<f2')}
+
+
+def pack_embedding(vector, dtype: str = 'float32', model: str = DEFAULT_MODEL) -> bytes:
+    """Empaquetar un embedding en bytes con cabecera"""
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"dtype no soportado: {dtype}")
+
+    array = np.asarray(vector, dtype=_CODE_DTYPES[_DTYPE_CODES[dtype]]).ravel()
+    model_bytes = model.encode('utf-8')[:255]
+
+    header = _HEADER.pack(EMBEDDING_MAGIC, _DTYPE_CODES[dtype], array.shape[0], len(model_bytes))
+    return header + model_bytes + array.tobytes()
+
+
+def read_header(blob: bytes) -> Tuple[np.dtype, int, str, int]:
+    """Leer cabecera: (dtype, dim, modelo, offset de datos)"""
+    magic, code, dim, model_len = _HEADER.unpack_from(blob)
+    if magic != EMBEDDING_MAGIC:
+        raise ValueError("Embedding sin cabecera binaria")
+
+    offset = _HEADER.size + model_len
+    model = bytes(blob[_HEADER.size:offset]).decode('utf-8')
+    return _CODE_DTYPES[code], dim, model, offset
+
+
+def is_legacy_json(blob) -> bool:
+    """Embeddings antiguos guardados como texto JSON"""
+    if isinstance(blob, str):
+        return True
+    return bytes(blob[:1]) == b'['
+
+
+def unpack_embedding(blob) -> Optional[np.ndarray]:
+    """Desempaquetar un embedding (binario o JSON antiguo) como float32"""
+    if blob is None:
+        return None
+
+    if is_legacy_json(blob):
+        text = blob if isinstance(blob, str) else bytes(blob).decode('utf-8')
+        values = json.loads(text)
+        return np.asarray(values, dtype=np.float32) if values else None
+
+    dtype, dim, _, offset = read_header(blob)
+    return np.frombuffer(blob, dtype=dtype, count=dim, offset=offset).astype(np.float32)
+
+
+def unpack_embeddings(blobs: Iterable) -> np.ndarray:
+    """
+    Desempaquetar varios embeddings en una matriz contigua (n, dim) float32.
+    Si todas las filas comparten cabecera se decodifican con un único
+    np.frombuffer sobre el buffer concatenado.
+    """
+    blobs = [bytes(b) if isinstance(b, (bytearray, memoryview)) else b for b in blobs]
+    if not blobs:
+        return np.empty((0, 0), dtype=np.float32)
+
+    first = blobs[0]
+    if not any(is_legacy_json(b) for b in blobs):
+        dtype, dim, _, offset = read_header(first)
+        row_size = offset + dim * dtype.itemsize
+        prefix = first[:offset]
+
+        if all(len(b) == row_size and b[:offset] == prefix for b in blobs):
+            record = np.dtype([('header', f'V{offset}'), ('vector', dtype, (dim,))])
+            rows = np.frombuffer(b''.join(blobs), dtype=record)
+            return np.ascontiguousarray(rows['vector'], dtype=np.float32)
+
+    vectors = [unpack_embedding(b) for b in blobs]
+    dim = next((v.shape[0] for v in vectors if v is not None), 0)
+    out = np.zeros((len(vectors), dim), dtype=np.float32)
+    for i, vector in enumerate(vectors):
+        if vector is not None:
+            out[i] = vector
+    return out
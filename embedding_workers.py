@@ -0,0 +1,97 @@
+"""
+Pool de procesos para generar embeddings en CPU
+Cada proceso carga su propio modelo con un número fijo de hilos de torch;
+los lotes se reparten entre procesos y los resultados se recogen en orden.
+"""
+
+import multiprocessing as mp
+import os
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int, device: str, backend: str):
+    global _worker_model
+
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+
+    if backend == 'torch':
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+
+    from encoder_backends import load_encoder
+    _worker_model = load_encoder(backend, model_name, device=device, num_threads=threads)
+
+
+def _encode_shard(args):
+    shard_id, texts, batch_size = args
+    embeddings = _worker_model.encode(
+        texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False
+    )
+    return shard_id, embeddings.astype('float32')
+
+
+class EmbeddingWorkerPool:
+    def __init__(self, num_workers: Optional[int] = None, model_name: str = 'all-MiniLM-L6-v2',
+                 threads_per_worker: Optional[int] = None, device: str = 'cpu',
+                 backend: str = 'torch'):
+        cpus = os.cpu_count() or 1
+        self.num_workers = num_workers or cpus
+        self.threads_per_worker = threads_per_worker or max(1, cpus // self.num_workers)
+        self.model_name = model_name
+
+        logger.info(
+            f"Iniciando {self.num_workers} workers de embeddings "
+            f"({self.threads_per_worker} hilos c/u)"
+        )
+        ctx = mp.get_context('spawn')
+        self._pool = ctx.Pool(
+            self.num_workers,
+            initializer=_init_worker,
+            initargs=(model_name, self.threads_per_worker, device, backend)
+        )
+        self._dimension = None
+
+    def warmup(self):
+        """Calentar los workers (carga del modelo)"""
+        shards = [(i, ["warmup"], 1) for i in range(self.num_workers)]
+        for _, embeddings in self._pool.imap_unordered(_encode_shard, shards):
+            self._dimension = embeddings.shape[1]
+
+    def encode(self, texts: List[str], batch_size: int = 64, shard_size: Optional[int] = None) -> np.ndarray:
+        """Codificar textos repartiendo lotes entre procesos (orden original)"""
+        if not texts:
+            return np.empty((0, self._dimension or 0), dtype='float32')
+
+        shard_size = shard_size or batch_size * 4
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+
+        shards = [
+            (start, [texts[i] for i in order[start:start + shard_size]], batch_size)
+            for start in range(0, len(order), shard_size)
+        ]
+
+        out = None
+        for start, embeddings in self._pool.imap_unordered(_encode_shard, shards):
+            if out is None:
+                out = np.empty((len(texts), embeddings.shape[1]), dtype='float32')
+                self._dimension = embeddings.shape[1]
+            out[order[start:start + len(embeddings)]] = embeddings
+        return out
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
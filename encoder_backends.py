@@ -0,0 +1,194 @@
+"""
+Backends del codificador de embeddings
+- torch: SentenceTransformer en fp32
+- onnx: export ONNX de all-MiniLM-L6-v2 cuantizado a int8 (ONNX Runtime, CPU)
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+BACKENDS = ('torch', 'onnx')
+DEFAULT_ONNX_DIR = "models/all-MiniLM-L6-v2-onnx-int8"
+
+
+def export_onnx_model(model_name: str = 'all-MiniLM-L6-v2', output_dir: str = DEFAULT_ONNX_DIR,
+                      opset: int = 14) -> Path:
+    """Exportar el transformer a ONNX y cuantizar los pesos a int8"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    dummy = tokenizer(["exportación de ejemplo"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    fp32_path = output_dir / "model_fp32.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    quantize_dynamic(str(fp32_path), str(output_dir / "model_int8.onnx"), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+
+    tokenizer.save_pretrained(str(output_dir))
+    with open(output_dir / "encoder_config.json", 'w') as f:
+        json.dump({
+            'model_name': model_name,
+            'revision': model_revision(model_name),
+            'max_seq_length': st_model.max_seq_length,
+            'dimension': st_model.get_sentence_embedding_dimension(),
+            'input_names': input_names,
+            'pooling': 'mean',
+            'normalize': True,
+        }, f, indent=2)
+
+    logger.success(f"Modelo ONNX int8 exportado en {output_dir}")
+    return output_dir
+
+
+class OnnxEncoder:
+    """Codificador compatible con SentenceTransformer.encode sobre ONNX Runtime"""
+
+    def __init__(self, model_dir: str = DEFAULT_ONNX_DIR, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        with open(model_dir / "encoder_config.json") as f:
+            self.config = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(
+            str(model_dir / "model_int8.onnx"), options, providers=['CPUExecutionProvider']
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.max_seq_length = self.config['max_seq_length']
+        self.input_names = self.config['input_names']
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config['dimension']
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True,
+            max_length=self.max_seq_length, return_tensors='np'
+        )
+        inputs = {name: tokens[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, inputs)[0]
+
+        mask = tokens['attention_mask'][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config.get('normalize', True):
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               show_progress_bar: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        out = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+
+        return out[0] if single else out
+
+
+def load_encoder(backend: str = 'torch', model_name: str = 'all-MiniLM-L6-v2',
+                 onnx_dir: str = DEFAULT_ONNX_DIR, device: str = None, num_threads: Optional[int] = None):
+    """Crear el codificador del backend indicado"""
+    if backend == 'torch':
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name, device=device)
+
+    if backend == 'onnx':
+        if not (Path(onnx_dir) / "model_int8.onnx").exists():
+            logger.info("Modelo ONNX no encontrado, exportando...")
+            export_onnx_model(model_name, onnx_dir)
+        return OnnxEncoder(onnx_dir, num_threads=num_threads)
+
+    raise ValueError(f"Backend desconocido: {backend}")
+
+
+def _hub_cache_dir() -> Path:
+    try:
+        from huggingface_hub.constants import HF_HUB_CACHE
+        return Path(HF_HUB_CACHE)
+    except ImportError:
+        hf_home = os.getenv('HF_HOME', os.path.join(os.path.expanduser('~'), '.cache', 'huggingface'))
+        return Path(os.getenv('HF_HUB_CACHE', os.path.join(hf_home, 'hub')))
+
+
+def model_revision(model_name: str = 'all-MiniLM-L6-v2') -> Optional[str]:
+    """
+    Commit del modelo en la caché de Hugging Face (refs/main), sin cargarlo.
+    EMBEDDING_MODEL_REVISION lo fija a mano; None si no se puede determinar.
+    """
+    configured = os.getenv('EMBEDDING_MODEL_REVISION')
+    if configured:
+        return configured
+    if Path(model_name).exists():
+        return None
+
+    repo_id = model_name if '/' in model_name else f'sentence-transformers/{model_name}'
+    ref = _hub_cache_dir() / f"models--{repo_id.replace('/', '--')}" / "refs" / "main"
+    if ref.exists():
+        return ref.read_text().strip() or None
+    return None
+
+
+def backend_revision(backend: str, model_name: str = 'all-MiniLM-L6-v2',
+                     onnx_dir: str = DEFAULT_ONNX_DIR) -> Optional[str]:
+    """Revisión usada como clave de caché (los embeddings difieren por modelo y backend)"""
+    if backend == 'torch':
+        return model_revision(model_name)
+
+    if backend == 'onnx':
+        config_path = Path(onnx_dir) / "encoder_config.json"
+        if not config_path.exists():
+            return None
+        with open(config_path) as f:
+            revision = json.load(f).get('revision')
+        return f'{revision}-onnx-int8' if revision else None
+
+    raise ValueError(f"Backend desconocido: {backend}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Exportar MiniLM a ONNX int8')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--output', default=DEFAULT_ONNX_DIR)
+    args = parser.parse_args()
+
+    export_onnx_model(args.model, args.output)
@@ -0,0 +1,98 @@
+"""
+Resumen extractivo basado en embeddings de oraciones
+Puntúa las oraciones por centralidad (coseno al centroide del documento o
+TextRank sobre la matriz de similitud) con operaciones NumPy vectorizadas.
+Las oraciones de todos los papers se codifican en una sola llamada por lotes.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+METHODS = ('centroid', 'textrank')
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+def centroid_scores(embeddings: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Coseno de cada oración al centroide de su documento (todos los documentos a la vez)"""
+    counts = np.diff(np.append(offsets, len(embeddings)))
+    centroids = _normalize(np.add.reduceat(embeddings, offsets, axis=0) / counts[:, None])
+    segment = np.repeat(np.arange(len(offsets)), counts)
+    return np.einsum('ij,ij->i', embeddings, centroids[segment])
+
+
+def textrank_scores(embeddings: np.ndarray, damping: float = 0.85,
+                    iterations: int = 50, tol: float = 1e-6) -> np.ndarray:
+    """PageRank sobre el grafo de similitud de oraciones de un documento"""
+    n = len(embeddings)
+    if n == 1:
+        return np.ones(1, dtype=np.float32)
+
+    similarity = np.clip(embeddings @ embeddings.T, 0, None)
+    np.fill_diagonal(similarity, 0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, row_sums, out=np.full_like(similarity, 1 / n), where=row_sums > 0)
+
+    scores = np.full(n, 1 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tol:
+            return updated
+        scores = updated
+    return scores
+
+
+class ExtractiveSummarizer:
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], method: str = 'centroid',
+                 max_candidates: int = 80, min_length: int = 100):
+        if method not in METHODS:
+            raise ValueError(f"Método de resumen desconocido: {method}")
+        self.encode_fn = encode_fn
+        self.method = method
+        self.max_candidates = max_candidates
+        self.min_length = min_length
+
+    def summarize_documents(self, documents, sections: Dict[str, int]) -> Dict[str, List[Optional[str]]]:
+        """
+        Resumir varias secciones de varios PaperDocument con un único encode.
+        sections: {sección: número máximo de oraciones}
+        """
+        summaries = {section: [None] * len(documents) for section in sections}
+        segments, sentences, offsets = [], [], []
+
+        for section, max_sentences in sections.items():
+            for i, document in enumerate(documents):
+                content = document.section_text(section)
+                if not content or len(content) < self.min_length or \
+                        len(document.sentences(section)) <= max_sentences:
+                    summaries[section][i] = content
+                    continue
+
+                segments.append((section, i, max_sentences))
+                offsets.append(len(sentences))
+                sentences.extend(document.sentences(section)[:self.max_candidates])
+
+        if not segments:
+            return summaries
+
+        embeddings = _normalize(np.asarray(self.encode_fn(sentences), dtype=np.float32))
+        offsets = np.asarray(offsets)
+        bounds = np.append(offsets, len(sentences))
+
+        if self.method == 'centroid':
+            scores = centroid_scores(embeddings, offsets)
+        else:
+            scores = np.concatenate([
+                textrank_scores(embeddings[start:end]) for start, end in zip(bounds[:-1], bounds[1:])
+            ])
+
+        for (section, i, max_sentences), start, end in zip(segments, bounds[:-1], bounds[1:]):
+            segment_scores = scores[start:end]
+            # Oraciones más centrales, en su orden original
+            top = np.sort(np.argpartition(-segment_scores, max_sentences - 1)[:max_sentences])
+            summaries[section][i] = ' '.join(sentences[start + j] for j in top)
+
+        return summaries
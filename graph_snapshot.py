@@ -0,0 +1,266 @@
+"""
+Snapshot binario y versionado del grafo de conocimiento
+Adyacencia no dirigida en CSR (indptr, indices, weights) más el mapa
+fila -> id_paper, un .npy por array dentro de un directorio por versión.
+Al cargar se usan memory maps, así que un proceso que solo atiende consultas
+responde vecinos sin reconstruir el grafo ni consultar MySQL.
+
+Cada fila de la adyacencia se guarda ordenada por peso descendente: el top-k
+de un paper es un slice de k elementos. Año y temas de cada nodo (PAPER,
+PAPER_THEME) van en el snapshot para filtrar sin consultar la base.
+"""
+
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+DEFAULT_SNAPSHOT_DIR = "outputs/graph_snapshot"
+FORMAT_VERSION = 2
+ARRAYS = ('node_ids', 'indptr', 'indices', 'weights', 'years', 'theme_indptr', 'theme_ids')
+MANIFEST = "manifest.json"
+
+
+class GraphSnapshot:
+    def __init__(self, node_ids: np.ndarray, indptr: np.ndarray, indices: np.ndarray,
+                 weights: np.ndarray, years: Optional[np.ndarray] = None,
+                 theme_indptr: Optional[np.ndarray] = None, theme_ids: Optional[np.ndarray] = None,
+                 version: int = 0, created_at: Optional[str] = None):
+        self.node_ids = node_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        # Atributos por nodo: año (0 = desconocido) y temas en CSR
+        self.years = years if years is not None else np.zeros(len(node_ids), dtype=np.int16)
+        self.theme_indptr = theme_indptr if theme_indptr is not None else np.zeros(len(node_ids) + 1, dtype=np.int64)
+        self.theme_ids = theme_ids if theme_ids is not None else np.empty(0, dtype=np.int32)
+        self.version = version
+        self.created_at = created_at
+
+    @classmethod
+    def from_edges(cls, node_ids: np.ndarray, sources: np.ndarray, targets: np.ndarray,
+                   weights: np.ndarray) -> 'GraphSnapshot':
+        """Aristas no dirigidas (id_paper, id_paper, peso) -> CSR simétrica"""
+        from scipy import sparse
+
+        node_ids = np.unique(np.concatenate([np.asarray(node_ids), sources, targets]).astype(np.int64))
+        rows = np.searchsorted(node_ids, sources)
+        cols = np.searchsorted(node_ids, targets)
+
+        n = len(node_ids)
+        adjacency = sparse.csr_matrix(
+            (np.concatenate([weights, weights]).astype(np.float64),
+             (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+            shape=(n, n)
+        )
+        # Vecinos de cada fila por peso descendente
+        entry_rows = np.repeat(np.arange(n), np.diff(adjacency.indptr))
+        order = np.lexsort((-adjacency.data, entry_rows))
+        return cls(node_ids, adjacency.indptr.astype(np.int64), adjacency.indices[order].astype(np.int32),
+                   adjacency.data[order])
+
+    def _rows(self, paper_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(filas, encontrado) de un array de id_paper"""
+        positions = np.clip(np.searchsorted(self.node_ids, paper_ids), 0, max(len(self) - 1, 0))
+        found = self.node_ids[positions] == paper_ids if len(self) else np.zeros(len(paper_ids), dtype=bool)
+        return positions, found
+
+    def set_attributes(self, paper_years: Iterable[Tuple[int, int]], paper_themes: Iterable[Tuple[int, int]]):
+        """Pares (id_paper, año) y (id_paper, id_theme) alineados a node_ids"""
+        years = np.array([(p, y) for p, y in paper_years if y], dtype=np.int64).reshape(-1, 2)
+        rows, found = self._rows(years[:, 0])
+        self.years = np.zeros(len(self), dtype=np.int16)
+        self.years[rows[found]] = years[found, 1]
+
+        themes = np.array(list(paper_themes), dtype=np.int64).reshape(-1, 2)
+        rows, found = self._rows(themes[:, 0])
+        pairs = np.unique(np.column_stack([rows[found], themes[found, 1]]), axis=0)
+        self.theme_indptr = np.concatenate([[0], np.cumsum(np.bincount(pairs[:, 0], minlength=len(self)))])
+        self.theme_ids = pairs[:, 1].astype(np.int32)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def index_of(self, paper_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self.node_ids, paper_id))
+        if position < len(self.node_ids) and self.node_ids[position] == paper_id:
+            return position
+        return None
+
+    def _matches(self, rows: np.ndarray, theme_id: Optional[int], year_from: Optional[int],
+                 year_to: Optional[int]) -> np.ndarray:
+        keep = np.ones(len(rows), dtype=bool)
+        if year_from is not None or year_to is not None:
+            years = self.years[rows]
+            keep &= years > 0
+            if year_from is not None:
+                keep &= years >= year_from
+            if year_to is not None:
+                keep &= years <= year_to
+        if theme_id is not None:
+            # Temas de todas las filas de una vez (slices CSR concatenados)
+            starts = np.asarray(self.theme_indptr[rows])
+            lengths = np.asarray(self.theme_indptr[rows + 1]) - starts
+            owners = np.repeat(np.arange(len(rows)), lengths)
+            positions = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+            has_theme = np.zeros(len(rows), dtype=bool)
+            has_theme[owners[np.asarray(self.theme_ids[positions]) == theme_id]] = True
+            keep &= has_theme
+        return keep
+
+    def _top_row(self, row: int, k: int, **filters) -> Tuple[np.ndarray, np.ndarray]:
+        """(filas, pesos) de los k vecinos más fuertes que pasan los filtros"""
+        start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+        if not any(value is not None for value in filters.values()):
+            end = min(end, start + k)
+            return np.asarray(self.indices[start:end]), np.asarray(self.weights[start:end])
+
+        # Con filtros se recorre la fila ya ordenada por bloques hasta juntar k
+        rows, weights, found = [], [], 0
+        chunk = max(4 * k, 64)
+        for offset in range(start, end, chunk):
+            block = np.asarray(self.indices[offset:min(offset + chunk, end)])
+            keep = self._matches(block, **filters)
+            rows.append(block[keep])
+            weights.append(np.asarray(self.weights[offset:min(offset + chunk, end)])[keep])
+            found += int(keep.sum())
+            if found >= k:
+                break
+        if not rows:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        return np.concatenate(rows)[:k], np.concatenate(weights)[:k]
+
+    def top_neighbors(self, paper_id: int, k: int = 10, hops: int = 1, theme_id: Optional[int] = None,
+                      year_from: Optional[int] = None, year_to: Optional[int] = None,
+                      fanout: Optional[int] = None, path_weight: float = 0.5) -> List[Dict]:
+        """
+        Los k vecinos más fuertes por peso, opcionalmente a 2 saltos.
+        A 2 saltos el score de c suma la arista directa y todos los caminos a-b-c:
+        w(a,c) + path_weight * Σ_b w(a,b) * w(b,c). Así un paper sin arista directa
+        pero con muchos vecinos en común puede superar a un vecino directo débil.
+        Se exploran los `fanout` vecinos más fuertes de cada salto; `hops` es 1 para
+        los vecinos directos dentro del fanout y 2 para el resto.
+        """
+        if hops not in (1, 2):
+            raise ValueError("hops debe ser 1 o 2")
+        row = self.index_of(paper_id)
+        if row is None:
+            return []
+        filters = {'theme_id': theme_id, 'year_from': year_from, 'year_to': year_to}
+
+        if hops == 1:
+            rows, scores = self._top_row(row, k, **filters)
+            return [
+                {'id': int(self.node_ids[r]), 'strength': float(w), 'hops': 1}
+                for r, w in zip(rows.tolist(), scores.tolist())
+            ]
+
+        fanout = fanout or max(k, 10)
+        first_rows, first_weights = self._top_row(row, fanout)
+        path_rows, path_scores = [first_rows], [first_weights]
+        for middle, weight in zip(first_rows.tolist(), first_weights.tolist()):
+            second_rows, second_weights = self._top_row(middle, fanout)
+            path_rows.append(second_rows)
+            path_scores.append(path_weight * weight * second_weights)
+
+        # Suma de la arista directa y de todos los caminos por candidato
+        candidates, inverse = np.unique(np.concatenate(path_rows).astype(np.int64), return_inverse=True)
+        scores = np.zeros(len(candidates))
+        np.add.at(scores, inverse, np.concatenate(path_scores))
+
+        keep = (candidates != row) & self._matches(candidates, **filters)
+        candidates, scores = candidates[keep], scores[keep]
+        direct = np.isin(candidates, first_rows)
+        ranked = np.argsort(-scores, kind='stable')[:k]
+        return [
+            {'id': int(self.node_ids[candidates[i]]), 'strength': float(scores[i]), 'hops': 1 if direct[i] else 2}
+            for i in ranked.tolist()
+        ]
+
+    def neighbors(self, paper_id: int, limit: int = 10) -> List[Dict]:
+        return self.top_neighbors(paper_id, k=limit)
+
+    def save(self, directory: str = DEFAULT_SNAPSHOT_DIR, keep: int = 2) -> int:
+        """Escribir una versión nueva y publicarla reemplazando el manifest"""
+        directory = Path(directory)
+        manifest = read_manifest(directory)
+        version = (manifest['version'] if manifest else 0) + 1
+
+        version_dir = directory / f"v{version:06d}"
+        version_dir.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(version_dir / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+
+        self.version = version
+        self.created_at = datetime.now().isoformat(timespec='seconds')
+        tmp_path = directory / f".{MANIFEST}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'format': FORMAT_VERSION,
+                'version': version,
+                'path': version_dir.name,
+                'created_at': self.created_at,
+                'nodes': len(self),
+                'edges': self.n_edges,
+            }, f, indent=2)
+        tmp_path.replace(directory / MANIFEST)
+
+        # Versiones viejas (los lectores con memmap abierto no se ven afectados)
+        old_versions = sorted(p for p in directory.glob("v*") if p.is_dir() and p != version_dir)
+        for old in old_versions[:max(len(old_versions) - (keep - 1), 0)]:
+            shutil.rmtree(old, ignore_errors=True)
+
+        logger.success(f"Snapshot del grafo v{version}: {len(self)} nodos, {self.n_edges} relaciones")
+        return version
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_SNAPSHOT_DIR, mmap: bool = True) -> 'GraphSnapshot':
+        directory = Path(directory)
+        manifest = read_manifest(directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No hay snapshot del grafo en {directory}")
+        if manifest['format'] != FORMAT_VERSION:
+            raise ValueError(f"Formato de snapshot no soportado: {manifest['format']}")
+
+        version_dir = directory / manifest['path']
+        arrays = {
+            name: np.load(version_dir / f"{name}.npy", mmap_mode='r' if mmap else None, allow_pickle=False)
+            for name in ARRAYS
+        }
+        return cls(**arrays, version=manifest['version'], created_at=manifest['created_at'])
+
+
+def read_manifest(directory: str = DEFAULT_SNAPSHOT_DIR) -> Optional[Dict]:
+    path = Path(directory) / MANIFEST
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Consultar el snapshot del grafo de conocimiento')
+    parser.add_argument('paper_id', type=int)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--hops', type=int, choices=(1, 2), default=1)
+    parser.add_argument('--theme', type=int)
+    parser.add_argument('--year-from', type=int)
+    parser.add_argument('--year-to', type=int)
+    parser.add_argument('--dir', default=DEFAULT_SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    snapshot = GraphSnapshot.load(args.dir)
+    neighbors = snapshot.top_neighbors(args.paper_id, args.k, hops=args.hops, theme_id=args.theme,
+                                       year_from=args.year_from, year_to=args.year_to)
+    for neighbor in neighbors:
+        print(f"{neighbor['strength']:.4f}  {neighbor['id']}  ({neighbor['hops']} saltos)")
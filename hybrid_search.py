@@ -0,0 +1,246 @@
+"""
+Recuperación híbrida local: BM25 en memoria + índice vectorial FAISS
+Los rankings se combinan con reciprocal-rank fusion (RRF).
+"""
+
+import pickle
+import re
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import text
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its of on or
+that the their there these this to was were which with we our not than
+""".split())
+
+TEXT_FIELDS = ('title', 'abstract', 'results_section', 'methods_section', 'conclusions_section')
+
+
+def tokenize(text_value: str) -> List[str]:
+    return [t for t in _TOKEN.findall((text_value or '').lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Índice invertido BM25 con actualizaciones incrementales"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, title_boost: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.title_boost = title_boost
+
+        self.postings: Dict[str, tuple] = {}     # término -> (docs, frecuencias)
+        self.doc_lengths = array('i')
+        self.doc_paper_ids = array('q')
+        self.alive = array('b')
+        self.paper_to_doc: Dict[int, int] = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.paper_to_doc)
+
+    def _paper_tokens(self, paper: Dict) -> List[str]:
+        tokens = tokenize(paper.get('title')) * self.title_boost
+        for field in TEXT_FIELDS[1:]:
+            tokens.extend(tokenize(paper.get(field)))
+        return tokens
+
+    def add_paper(self, paper_id: int, paper: Dict):
+        """Indexar (o reindexar) un paper"""
+        tokens = self._paper_tokens(paper)
+
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        with self._lock:
+            self.remove_paper(paper_id)
+
+            doc = len(self.doc_lengths)
+            self.doc_lengths.append(len(tokens))
+            self.doc_paper_ids.append(paper_id)
+            self.alive.append(1)
+            self.paper_to_doc[paper_id] = doc
+            self.total_length += len(tokens)
+
+            for term, tf in counts.items():
+                entry = self.postings.get(term)
+                if entry is None:
+                    entry = (array('i'), array('i'))
+                    self.postings[term] = entry
+                entry[0].append(doc)
+                entry[1].append(tf)
+
+    def remove_paper(self, paper_id: int):
+        with self._lock:
+            doc = self.paper_to_doc.pop(paper_id, None)
+            if doc is not None:
+                self.alive[doc] = 0
+                self.total_length -= self.doc_lengths[doc]
+
+    def search(self, query: str, k: int = 10):
+        """Top-k (ids de paper, puntuaciones) por BM25"""
+        terms = set(tokenize(query))
+        n_docs = len(self.paper_to_doc)
+        if not terms or n_docs == 0:
+            return [], []
+
+        with self._lock:
+            lengths = np.frombuffer(self.doc_lengths, dtype=np.int32)
+            alive = np.frombuffer(self.alive, dtype=np.int8)
+            avgdl = self.total_length / n_docs
+            scores = np.zeros(len(lengths), dtype=np.float32)
+
+            for term in terms:
+                entry = self.postings.get(term)
+                if entry is None:
+                    continue
+                docs = np.frombuffer(entry[0], dtype=np.int32)
+                tf = np.frombuffer(entry[1], dtype=np.int32).astype(np.float32)
+
+                live = alive[docs] == 1
+                df = int(live.sum())
+                if df == 0:
+                    continue
+                docs, tf = docs[live], tf[live]
+
+                idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avgdl)
+                scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            candidates = np.flatnonzero(scores)
+            if candidates.size == 0:
+                return [], []
+            if candidates.size > k:
+                top = np.argpartition(-scores[candidates], k)[:k]
+                candidates = candidates[top]
+            candidates = candidates[np.argsort(-scores[candidates])]
+
+            paper_ids = np.frombuffer(self.doc_paper_ids, dtype=np.int64)[candidates]
+            return paper_ids.tolist(), scores[candidates].tolist()
+
+    def compact(self):
+        """Reconstruir sin documentos eliminados"""
+        with self._lock:
+            old_to_new = np.full(len(self.doc_lengths), -1, dtype=np.int64)
+            alive = np.frombuffer(self.alive, dtype=np.int8) == 1
+            old_to_new[alive] = np.arange(int(alive.sum()))
+
+            for term, (docs, tfs) in list(self.postings.items()):
+                docs_np = np.frombuffer(docs, dtype=np.int32)
+                keep = alive[docs_np]
+                if not keep.any():
+                    del self.postings[term]
+                    continue
+                self.postings[term] = (
+                    array('i', old_to_new[docs_np[keep]].astype(np.int32).tobytes()),
+                    array('i', np.frombuffer(tfs, dtype=np.int32)[keep].tobytes()),
+                )
+
+            self.doc_lengths = array('i', np.frombuffer(self.doc_lengths, dtype=np.int32)[alive].tobytes())
+            self.doc_paper_ids = array('q', np.frombuffer(self.doc_paper_ids, dtype=np.int64)[alive].tobytes())
+            self.alive = array('b', b'\x01' * len(self.doc_lengths))
+            self.paper_to_doc = {pid: i for i, pid in enumerate(self.doc_paper_ids)}
+
+    def build_from_db(self, db, batch_size: int = 2000) -> int:
+        """Indexar todos los papers de la tabla PAPER"""
+        session = db.get_session()
+        try:
+            query = text(f"""
+                SELECT id_paper, {', '.join(TEXT_FIELDS)}
+                FROM PAPER
+            """).execution_options(stream_results=True)
+            result = session.execute(query)
+            count = 0
+            for rows in iter(lambda: result.fetchmany(batch_size), []):
+                for row in rows:
+                    self.add_paper(row.id_paper, row._mapping)
+                    count += 1
+            logger.success(f"Índice BM25 construido: {count} papers, {len(self.postings)} términos")
+            return count
+        finally:
+            session.close()
+
+    def attach(self, db):
+        """Mantener el índice al día con los papers insertados por `db`"""
+        db.paper_listeners.append(self.add_paper)
+
+    def save(self, path: str = "outputs/bm25_index.pkl"):
+        self.compact()
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with self._lock, open(tmp_path, 'wb') as f:
+            pickle.dump({k: v for k, v in self.__dict__.items() if k != '_lock'}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str = "outputs/bm25_index.pkl") -> 'BM25Index':
+        index = cls()
+        with open(path, 'rb') as f:
+            index.__dict__.update(pickle.load(f))
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60,
+                           weights: Optional[List[float]] = None) -> List[tuple]:
+    """Combinar rankings: score(d) = Σ w / (k + rango)"""
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, paper_id in enumerate(ranking, 1):
+            fused[paper_id] = fused.get(paper_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRetriever:
+    def __init__(self, bm25: BM25Index, semantic=None, db=None, rrf_k: int = 60):
+        self.bm25 = bm25
+        self.semantic = semantic
+        self.db = db or (semantic.db if semantic is not None else None)
+        self.rrf_k = rrf_k
+
+    def search_ids(self, query: str, k: int = 10, candidates: int = 100,
+                   weights: Optional[List[float]] = None) -> List[tuple]:
+        rankings = [self.bm25.search(query, candidates)[0]]
+        if self.semantic is not None:
+            rankings.append(self.semantic.search_ids(query, candidates)[0])
+        return reciprocal_rank_fusion(rankings, self.rrf_k, weights)[:k]
+
+    def search(self, query: str, k: int = 10, filters: Optional[Dict] = None,
+               candidates: int = 100) -> List[Dict]:
+        """Búsqueda híbrida BM25 + vectorial"""
+        fused = self.search_ids(query, k * 5 if filters else k, candidates)
+        if self.db is None:
+            return [{'id_paper': pid, 'score': score} for pid, score in fused[:k]]
+
+        rows = {row['id_paper']: row for row in self.db.get_papers_by_ids([pid for pid, _ in fused], filters)}
+        results = []
+        for paper_id, score in fused:
+            if paper_id in rows:
+                results.append({**rows[paper_id], 'score': score})
+                if len(results) >= k:
+                    break
+        return results
+
+
+if __name__ == "__main__":
+    import sys
+    from mysql_database import MySQLManager
+
+    db = MySQLManager()
+    bm25 = BM25Index()
+    bm25.build_from_db(db)
+
+    retriever = HybridRetriever(bm25, db=db)
+    query = ' '.join(sys.argv[1:]) or 'microgravity bone loss'
+    for paper in retriever.search(query, k=5):
+        print(f"[{paper['score']:.4f}] {paper['id_paper']}: {paper['title']}")
@@ -4,6 +4,8 @@ import pymysql
 
 from lxml import etree
 
+from dedup import DuplicateIndex, normalize_text
+
 from dotenv import load_dotenv, find_dotenv
 dotenv_path = find_dotenv(filename=".env", usecwd=True)
 load_dotenv(dotenv_path=dotenv_path, override=True)
@@ -108,12 +110,56 @@ def parse_references(jats_xml: bytes):
     print(f"[PARSE] Referencias encontradas: {len(items)}")
     return items
 
-def upsert_paper(cur, rec):
+_dedup_index = None
+
+def load_dedup_index(cur):
+    """Indice de duplicados del proceso: se construye una vez y luego se mantiene con add"""
+    global _dedup_index
+    if _dedup_index is None:
+        _dedup_index = DuplicateIndex()
+        cur.execute("SELECT id_paper, title, abstract FROM paper")
+        _dedup_index.build_from_rows(cur.fetchall())
+        print(f"[DEDUP] papers indexados: {len(_dedup_index)}")
+    return _dedup_index
+
+def find_title_match(cur, rec, dedup, exclude=None):
+    """
+    Paper existente que es el mismo que `rec`: titulo normalizado identico y
+    DOI/año compatibles. Los casi duplicados (MinHash) solo se reportan.
+    """
+    title = normalize_text(rec.get("title"))
+    for candidate, score in dedup.query(rec.get("title"), exclude=exclude):
+        if normalize_text(dedup.titles.get(candidate)) != title:
+            print(f"[DEDUP] posible duplicado id_paper={candidate} (sim={score:.2f}): "
+                  f"'{(rec.get('title') or '')[:60]}'")
+            continue
+        cur.execute("SELECT doi, year FROM paper WHERE id_paper=%s", (candidate,))
+        row = cur.fetchone()
+        if row is None:
+            continue
+        if rec.get("doi") and row["doi"] and row["doi"] != rec["doi"]:
+            print(f"[DEDUP] mismo titulo que id_paper={candidate} con DOI distinto: "
+                  f"'{(rec.get('title') or '')[:60]}'")
+            continue
+        if rec.get("year") and row["year"] and int(row["year"]) != int(rec["year"]):
+            print(f"[DEDUP] mismo titulo que id_paper={candidate} con año distinto: "
+                  f"'{(rec.get('title') or '')[:60]}'")
+            continue
+        return candidate, score
+    return None
+
+def upsert_paper(cur, rec, dedup=None, exclude=None):
     if rec.get("doi"):
         cur.execute("SELECT id_paper FROM paper WHERE doi=%s", (rec["doi"],))
         row = cur.fetchone()
         if row:
             return row["id_paper"]
+    # titulo casi igual (puntuacion, mayusculas) a un paper existente, nunca el propio `exclude`
+    if dedup is not None:
+        match = find_title_match(cur, rec, dedup, exclude)
+        if match:
+            print(f"[DEDUP] '{(rec.get('title') or '')[:60]}' -> id_paper={match[0]} (sim={match[1]:.2f})")
+            return match[0]
     cur.execute("""
         INSERT INTO paper (title, abstract, year, journal, doi)
         VALUES (%s,%s,%s,%s,%s)
@@ -124,13 +170,16 @@ def upsert_paper(cur, rec):
     """, (rec.get("title"), None, rec.get("year"), rec.get("journal"), rec.get("doi")))
     if rec.get("doi"):
         cur.execute("SELECT id_paper FROM paper WHERE doi=%s", (rec["doi"],))
-        return cur.fetchone()["id_paper"]
+        paper_id = cur.fetchone()["id_paper"]
     else:
         cur.execute("SELECT id_paper FROM paper WHERE title=%s AND (year <=> %s)", (rec.get("title"), rec.get("year")))
         r = cur.fetchone()
-        return r["id_paper"] if r else None
+        paper_id = r["id_paper"] if r else None
+    if dedup is not None and paper_id:
+        dedup.add(paper_id, rec.get("title"))
+    return paper_id
 
-def ingest_references_for_pmcid(pmcid: str):
+def ingest_references_for_pmcid(pmcid: str, dedup=None):
     xml = fetch_jats_xml(pmcid)
     main_title = parse_article_title(xml) or f"PMC {pmcid}"
     refs = parse_references(xml)
@@ -146,9 +195,15 @@ def ingest_references_for_pmcid(pmcid: str):
         main_id = cur.fetchone()["id_paper"]
         print(f"[MAIN] id_paper={main_id} | title='{main_title}'")
 
+        if dedup is None:
+            dedup = load_dedup_index(cur)
+        if main_id not in dedup.titles:
+            dedup.add(main_id, main_title)
         created = 0
         for i, r in enumerate(refs, start=1):
-            cited_id = upsert_paper(cur, r)
+            cited_id = upsert_paper(cur, r, dedup, exclude=main_id)
+            if cited_id == main_id:
+                continue
             if cited_id:
                 cur.execute("""
                     INSERT INTO citation (id_paper_used, id_paper_used_by)
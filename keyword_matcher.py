@@ -0,0 +1,152 @@
+"""
+Matcher de keywords/ontología con Aho-Corasick
+El autómata se construye una vez a partir de un vocabulario (TSV con término
+canónico y sinónimos) y recorre título, abstract y secciones en una sola pasada,
+respetando límites de palabra y contando apariciones por término canónico.
+"""
+
+import re
+from collections import Counter, deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+DEFAULT_VOCABULARY = Path(__file__).with_name("space_biology_vocabulary.tsv")
+
+_SPACES = re.compile(r'\s+')
+_FIELD_SEPARATOR = '\n'
+
+_matchers: Dict[str, 'KeywordMatcher'] = {}
+
+
+def normalize_term(text: str) -> str:
+    return _SPACES.sub(' ', text.lower()).strip()
+
+
+def load_vocabulary(path=DEFAULT_VOCABULARY) -> Dict[str, List[str]]:
+    """
+    Leer vocabulario TSV: término_canónico<TAB>sinónimo1|sinónimo2
+    Las líneas vacías o que empiezan por # se ignoran.
+    """
+    vocabulary: Dict[str, List[str]] = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            canonical, _, synonyms = line.partition('\t')
+            canonical = canonical.strip()
+            vocabulary.setdefault(canonical, []).extend(
+                s.strip() for s in synonyms.split('|') if s.strip()
+            )
+    return vocabulary
+
+
+class KeywordMatcher:
+    def __init__(self, vocabulary: Dict[str, Iterable[str]]):
+        self.canonical: List[str] = []
+        # Autómata: transiciones, enlace de fallo y salidas (longitud, id canónico)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int]]] = [[]]
+        self.n_patterns = 0
+
+        for canonical, synonyms in vocabulary.items():
+            term_id = len(self.canonical)
+            self.canonical.append(canonical)
+            for pattern in {normalize_term(canonical), *(normalize_term(s) for s in synonyms)}:
+                if pattern:
+                    self._add_pattern(pattern, term_id)
+
+        self._build_failure_links()
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_VOCABULARY) -> 'KeywordMatcher':
+        matcher = cls(load_vocabulary(path))
+        logger.info(f"Vocabulario cargado: {len(matcher.canonical)} términos, {matcher.n_patterns} patrones")
+        return matcher
+
+    def __len__(self):
+        return len(self.canonical)
+
+    def _add_pattern(self, pattern: str, term_id: int):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+
+        if (len(pattern), term_id) not in self._output[state]:
+            self._output[state].append((len(pattern), term_id))
+            self.n_patterns += 1
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                # Los sufijos que también son patrones se heredan del enlace de fallo
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def count(self, *fields: Optional[str]) -> Counter:
+        """Apariciones por término canónico en una sola pasada sobre todos los campos"""
+        text = _FIELD_SEPARATOR.join(normalize_term(field) for field in fields if field)
+        counts = Counter()
+        if not text:
+            return counts
+        # Fin del último match por término: sinónimos solapados ("bone", "bone loss") cuentan una vez
+        last_end: Dict[int, int] = {}
+
+        goto, fail, output = self._goto, self._fail, self._output
+        last = len(text) - 1
+        state = 0
+
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            if not output[state]:
+                continue
+            # Límite de palabra después del match
+            if position < last and text[position + 1].isalnum():
+                continue
+            for length, term_id in output[state]:
+                start = position - length + 1
+                if start and text[start - 1].isalnum():
+                    continue
+                if last_end.get(term_id, -1) < start:
+                    counts[term_id] += 1
+                last_end[term_id] = position
+
+        return Counter({self.canonical[term_id]: n for term_id, n in counts.items()})
+
+    def keywords(self, *fields: Optional[str], limit: int = 10) -> List[Tuple[str, float]]:
+        """(término, relevance_score) ordenados por apariciones; relevancia = n / n_max"""
+        counts = self.count(*fields)
+        if not counts:
+            return []
+
+        top = counts.most_common(limit)
+        max_count = top[0][1]
+        return [(term, round(n / max_count, 4)) for term, n in top]
+
+
+def get_keyword_matcher(path=DEFAULT_VOCABULARY) -> KeywordMatcher:
+    """Matcher construido una vez por proceso y vocabulario"""
+    key = str(path)
+    if key not in _matchers:
+        _matchers[key] = KeywordMatcher.from_file(path)
+    return _matchers[key]
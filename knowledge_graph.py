@@ -1,70 +1,175 @@
-import networkx as nx
-from pyvis.network import Network
+import numpy as np
 from mysql_database import MySQLManager
 from loguru import logger
+from graph_snapshot import DEFAULT_SNAPSHOT_DIR, GraphSnapshot
+
+
+def incidence_matrix(paper_ids, keywords):
+    """
+    Matriz dispersa CSR paper x keyword a partir de pares (paper, keyword).
+    Devuelve (matriz, ids de paper por fila).
+    """
+    from scipy import sparse
+    
+    papers, rows = np.unique(np.asarray(paper_ids), return_inverse=True)
+    _, cols = np.unique(np.asarray(keywords), return_inverse=True)
+    
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(papers), int(cols.max()) + 1 if len(cols) else 0)
+    )
+    # Pares repetidos cuentan una vez
+    matrix.data[:] = 1
+    return matrix, papers
+
+
+def shared_keyword_edges(incidence, min_shared=2, block_size=4096):
+    """
+    Keywords compartidas por cada par de papers con A @ A.T (por bloques de filas).
+    Devuelve (fila_i, fila_j, compartidas, fuerza) con i < j y compartidas >= min_shared.
+    """
+    from scipy import sparse
+    
+    degrees = np.asarray(incidence.sum(axis=1)).ravel()
+    transposed = incidence.T.tocsc()
+    
+    rows, cols, shared = [], [], []
+    for start in range(0, incidence.shape[0], block_size):
+        block = sparse.triu(incidence[start:start + block_size] @ transposed, k=start + 1).tocoo()
+        keep = block.data >= min_shared
+        rows.append(block.row[keep] + start)
+        cols.append(block.col[keep])
+        shared.append(block.data[keep])
+    
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+    shared = np.concatenate(shared) if shared else np.empty(0, dtype=np.int32)
+    strength = shared / (degrees[rows] + degrees[cols])
+    return rows, cols, shared, strength
+
 
 class KnowledgeGraphGenerator:
-    def __init__(self):
-        self.db = MySQLManager()
+    def __init__(self, db=None, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+        import networkx as nx
+        
+        self.db = db or MySQLManager()
         self.graph = nx.Graph()
+        self.snapshot_dir = snapshot_dir
+        self._snapshot = None
+        self.edges = None
+        
+    @property
+    def snapshot(self):
+        """Último snapshot guardado (memmap, se carga en el primer uso)"""
+        if self._snapshot is None:
+            try:
+                self._snapshot = GraphSnapshot.load(self.snapshot_dir)
+            except FileNotFoundError:
+                return None
+            except ValueError as e:
+                logger.warning(f"Snapshot ignorado, hay que regenerarlo: {e}")
+                return None
+        return self._snapshot
+        
+    def load_keyword_pairs(self, fetch_size=50000):
+        """Pares (id_paper, id_keyword) de PAPER_KEYWORD con cursor del servidor, en arrays NumPy"""
+        from sqlalchemy import text
         
+        session = self.db.get_session()
+        try:
+            query = text("SELECT id_paper, id_keyword FROM PAPER_KEYWORD").execution_options(
+                stream_results=True
+            )
+            result = session.execute(query)
+            
+            chunks = [
+                np.fromiter((value for row in rows for value in row), dtype=np.int64,
+                            count=2 * len(rows)).reshape(-1, 2)
+                for rows in iter(lambda: result.fetchmany(fetch_size), [])
+            ]
+        finally:
+            session.close()
+        
+        pairs = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+        return pairs[:, 0], pairs[:, 1]
+    
     def build_keyword_relations(self, min_shared=2):
         """Construir relaciones por keywords compartidas"""
         logger.info("Construyendo relaciones por keywords...")
         
-        session = self.db.get_session()
-        from sqlalchemy import text
+        paper_ids, keyword_ids = self.load_keyword_pairs()
+        if not len(paper_ids):
+            logger.warning("No hay keywords para relacionar")
+            return 0
         
-        query = text("""
-            SELECT p.id_paper, GROUP_CONCAT(k.word) as keywords
-            FROM PAPER p
-            JOIN PAPER_KEYWORD pk ON p.id_paper = pk.id_paper
-            JOIN KEYWORD k ON pk.id_keyword = k.id_keyword
-            GROUP BY p.id_paper
-        """)
-        
-        results = session.execute(query).fetchall()
-        session.close()
-        
-        paper_keywords = {}
-        for row in results:
-            if row.keywords:
-                paper_keywords[row.id_paper] = set(row.keywords.split(','))
-        
-        relations = 0
-        paper_ids = list(paper_keywords.keys())
-        
-        for i in range(len(paper_ids)):
-            for j in range(i+1, min(i+50, len(paper_ids))):  # Limitar para eficiencia
-                p1, p2 = paper_ids[i], paper_ids[j]
-                
-                shared = paper_keywords[p1].intersection(paper_keywords[p2])
-                
-                if len(shared) >= min_shared:
-                    strength = len(shared) / (len(paper_keywords[p1]) + len(paper_keywords[p2]))
-                    
-                    self.graph.add_edge(p1, p2, weight=strength)
-                    relations += 1
+        self.incidence, self.paper_ids = incidence_matrix(paper_ids, keyword_ids)
+        rows, cols, shared, strength = shared_keyword_edges(self.incidence, min_shared)
+        self.edges = (self.paper_ids[rows], self.paper_ids[cols], strength)
+        
+        self.graph.add_weighted_edges_from(
+            zip(self.paper_ids[rows].tolist(), self.paper_ids[cols].tolist(), strength.tolist())
+        )
+        relations = len(rows)
         
         logger.success(f"{relations} relaciones creadas")
         return relations
     
+    def load_node_attributes(self):
+        """Pares (id_paper, año) y (id_paper, id_theme) para filtrar vecinos"""
+        from sqlalchemy import text
+        
+        session = self.db.get_session()
+        try:
+            years = session.execute(text("SELECT id_paper, year FROM PAPER WHERE year IS NOT NULL")).fetchall()
+            themes = session.execute(text("SELECT id_paper, id_theme FROM PAPER_THEME")).fetchall()
+            return [tuple(row) for row in years], [tuple(row) for row in themes]
+        finally:
+            session.close()
+    
+    def save_snapshot(self):
+        """Publicar el grafo construido como snapshot versionado"""
+        if self.edges is None:
+            logger.warning("No hay relaciones construidas para guardar")
+            return None
+        sources, targets, weights = self.edges
+        snapshot = GraphSnapshot.from_edges(self.paper_ids, sources, targets, weights)
+        snapshot.set_attributes(*self.load_node_attributes())
+        snapshot.save(self.snapshot_dir)
+        self._snapshot = snapshot
+        return snapshot.version
+    
+    def build_citation_metrics(self, force=False):
+        """PageRank/HITS/grados del grafo de citas, refrescados en PAPER_METRICS"""
+        from citation_graph import CitationMetricsStore
+        
+        logger.info("Calculando métricas de citas...")
+        return CitationMetricsStore(self.db).refresh(force=force)
+    
+    def most_influential_papers(self, metric='pagerank', limit=20):
+        """Papers más influyentes según PAPER_METRICS (sin reconstruir el grafo)"""
+        return self.db.get_top_papers_by_metric(metric, limit)
+    
     def generate_all_relations(self):
         """Generar todas las relaciones"""
         logger.info("Generando grafo de conocimiento...")
         
         relations = self.build_keyword_relations()
+        self.save_snapshot()
+        citation_metrics = self.build_citation_metrics()
         
         # Visualizar
         self.visualize_graph()
         
         return {
             'nodes': self.graph.number_of_nodes(),
-            'edges': self.graph.number_of_edges()
+            'edges': self.graph.number_of_edges(),
+            'citation_metrics': citation_metrics
         }
     
     def visualize_graph(self, max_nodes=50):
         """Generar visualización HTML"""
+        from pyvis.network import Network
+        
         logger.info("Generando visualización...")
         
         net = Network(height="750px", width="100%", bgcolor="#222", font_color="white")
@@ -88,17 +193,26 @@ class KnowledgeGraphGenerator:
         net.save_graph("outputs/knowledge_graph.html")
         logger.success("Grafo guardado en outputs/knowledge_graph.html")
     
-    def get_paper_neighbors(self, paper_id, limit=10):
-        """Obtener papers relacionados"""
+    def get_paper_neighbors(self, paper_id, limit=10, hops=1, theme_id=None, year_from=None, year_to=None):
+        """Papers relacionados más fuertes (desde el snapshot si existe)"""
+        if self.snapshot is not None:
+            return self.snapshot.top_neighbors(paper_id, limit, hops=hops, theme_id=theme_id,
+                                               year_from=year_from, year_to=year_to)
+        
         if paper_id not in self.graph:
             return []
+        if hops != 1 or theme_id is not None or year_from is not None or year_to is not None:
+            logger.warning("Sin snapshot: se ignoran hops y filtros")
         
-        neighbors = list(self.graph.neighbors(paper_id))[:limit]
+        neighbors = sorted(
+            self.graph[paper_id].items(), key=lambda item: -item[1].get('weight', 0)
+        )[:limit]
         
         return [{
             'id': n,
-            'strength': self.graph[paper_id][n].get('weight', 0)
-        } for n in neighbors]
+            'strength': data.get('weight', 0),
+            'hops': 1
+        } for n, data in neighbors]
 
 
 if __name__ == "__main__":
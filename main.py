@@ -6,44 +6,90 @@ import re
 from pathlib import Path
 from sqlalchemy import text
 from datetime import datetime
-import pandas as pd
 
-logger.remove()
-logger.add(
-    sys.stdout, 
-    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>"
-)
-logger.add("logs/app_{time}.log", rotation="1 day", retention="7 days")
+from mysql_database import MySQLManager
 
-Path("logs").mkdir(exist_ok=True)
-Path("outputs").mkdir(exist_ok=True)
+_runtime_ready = False
 
-from mysql_database import MySQLManager
-from process_ingest import CompletePipeline
-from knowledge_graph import KnowledgeGraphGenerator
-from nasa_api_integration import NASAAPIIntegration
+def setup_runtime():
+    """Configurar logs y directorios de salida (una sola vez, no al importar)"""
+    global _runtime_ready
+    if _runtime_ready:
+        return
+    
+    Path("logs").mkdir(exist_ok=True)
+    Path("outputs").mkdir(exist_ok=True)
+    
+    logger.remove()
+    logger.add(
+        sys.stdout, 
+        format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>"
+    )
+    logger.add("logs/app_{time}.log", rotation="1 day", retention="7 days")
+    _runtime_ready = True
 
 class MainOrchestrator:
-    def __init__(self):
+    def __init__(self, embedding_workers: int = 0, encoder_backend: str = 'torch'):
+        setup_runtime()
         logger.info("=" * 80)
         logger.info("NASA SPACE BIOLOGY KNOWLEDGE ENGINE")
         logger.info("=" * 80)
-        self.db = MySQLManager() ##A
         try:
             self.db = MySQLManager()
             self.pipeline = None
             self.kg = None
-            self.nasa_api = NASAAPIIntegration()
+            self.embedding_workers = embedding_workers
+            self.encoder_backend = encoder_backend
+            self._nasa_api = None
+            self._content_extractor = None
+            self._dedup_index = None
             logger.success("Inicialización exitosa")
         except Exception as e:
             logger.error(f"Error inicializando: {e}")
             sys.exit(1)
     
+    @property
+    def nasa_api(self):
+        if self._nasa_api is None:
+            from nasa_api_integration import NASAAPIIntegration
+            self._nasa_api = NASAAPIIntegration()
+        return self._nasa_api
+    
+    @property
+    def content_extractor(self):
+        if self._content_extractor is None:
+            from paper_content_extractor import PaperContentExtractor
+            self._content_extractor = PaperContentExtractor()
+        return self._content_extractor
+    
+    @property
+    def dedup_index(self):
+        """Índice MinHash de títulos/abstracts, actualizado con cada insert_paper"""
+        if self._dedup_index is None:
+            from dedup import DuplicateIndex
+            self._dedup_index = DuplicateIndex()
+            self._dedup_index.build_from_db(self.db)
+            self._dedup_index.attach(self.db)
+        return self._dedup_index
+    
+    def get_pipeline(self):
+        """Pipeline IA (modelo) creado en el primer paso que lo necesita"""
+        if self.pipeline is None:
+            from process_ingest import CompletePipeline
+            self.pipeline = CompletePipeline(
+                db=self.db,
+                num_workers=self.embedding_workers,
+                backend=self.encoder_backend
+            )
+        return self.pipeline
+    
     def step1_ingest_and_extract(self, csv_path: str, limit: int = None):
         logger.info("=" * 80)
         logger.info("PASO 1: INGESTA Y EXTRACCIÓN COMPLETA")
         logger.info("=" * 80)
         
+        import pandas as pd
+        
         try:
             try:
                 df = pd.read_csv("https://raw.githubusercontent.com/jgalazka/SB_publications/main/SB_publications.csv")
@@ -60,6 +106,7 @@ class MainOrchestrator:
             
             ingested = 0
             skipped = 0
+            flagged = 0
             
             for idx, row in df.iterrows():
                 try:
@@ -83,6 +130,13 @@ class MainOrchestrator:
                         logger.debug(f"Paper ya existe: {title[:50]}...")
                         continue
                     
+                    # Solo se marca: la fusión se revisa con el merge_report de dedup
+                    duplicates = self.dedup_index.query(title)
+                    if duplicates:
+                        logger.warning(f"Posible duplicado de paper {duplicates[0][0]} "
+                                       f"(sim={duplicates[0][1]:.2f}): {title[:50]}...")
+                        flagged += 1
+                    
                     logger.info(f"[{idx+1}/{len(df)}] Extrayendo: {title[:60]}...")
                     
                     # EXTRAER CONTENIDO COMPLETO DESDE LA URL
@@ -117,6 +171,8 @@ class MainOrchestrator:
                     continue
             
             logger.success(f"Ingesta completada: {ingested} papers, {skipped} omitidos")
+            if flagged:
+                logger.info(f"{flagged} posibles duplicados marcados (ver python dedup.py)")
             return ingested
             
         except Exception as e:
@@ -162,7 +218,7 @@ class MainOrchestrator:
                             pmcid = match.group()
                     
                     if pmcid:
-                        result = ingest_references_for_pmcid(pmcid)
+                        result = ingest_references_for_pmcid(pmcid, dedup=self.dedup_index)
                         citations_total += result['edges_created']
                         logger.success(f"{pmcid}: {result['edges_created']} citas")
                     
@@ -177,57 +233,21 @@ class MainOrchestrator:
             logger.error(f"Error extrayendo citas: {e}")
             return 0
     
-    def step3_process_with_ai(self, limit: int = None):
+    def step3_process_with_ai(self, limit: int = None, batch_size: int = 64):
         logger.info("=" * 80)
         logger.info("PASO 3: PROCESAMIENTO CON IA")
         logger.info("=" * 80)
         
         try:
-            if self.pipeline is None:
-                self.pipeline = CompletePipeline()
-            
-            session = self.db.get_session()
-            query = text("""
-                SELECT p.id_paper, p.title, p.abstract
-                FROM PAPER p
-                LEFT JOIN AI_SUMMARY ai ON p.id_paper = ai.id_paper
-                WHERE ai.id_paper IS NULL AND p.abstract IS NOT NULL
-                LIMIT :limit
-            """)
+            from ai_pipeline import AIProcessingPipeline
             
-            papers = session.execute(query, {'limit': limit or 1000}).mappings().all()
-            session.close()
+            stages = AIProcessingPipeline(self.get_pipeline(), self.db, batch_size=batch_size)
+            processed = stages.run(limit=limit)
             
-            if not papers:
+            if not processed:
                 logger.info("No hay papers pendientes")
                 return 0
             
-            logger.info(f"Procesando {len(papers)} papers...")
-            
-            processed = 0
-            for i, paper in enumerate(papers, 1):
-                try:
-                    result = self.pipeline.process_single_paper({
-                        'id_paper': paper['id_paper'],
-                        'title': paper.get('title'),
-                        'abstract': paper.get('abstract')
-                    })
-                    
-                    self.db.insert_ai_summary(result)
-                    
-                    for keyword in result.get('keywords', []):
-                        kw_id = self.db.insert_keyword(keyword)
-                        self.db.link_paper_keyword(paper['id_paper'], kw_id)
-                    
-                    processed += 1
-                    
-                    if i % 20 == 0:
-                        logger.info(f"IA: {i}/{len(papers)}")
-                    
-                except Exception as e:
-                    logger.warning(f"Error en {paper['id_paper']}: {e}")
-                    continue
-            
             logger.success(f"IA completada: {processed} papers")
             return processed
             
@@ -252,61 +272,21 @@ class MainOrchestrator:
         
         return len(themes)
     
-    def step5_assign_themes(self):
-        logger.info("=" * 80)
-        logger.info("PASO 5: ASIGNACIÓN DE TEMAS")
-        logger.info("=" * 80)
-        
-        session = self.db.get_session()
-        papers = session.execute(text("SELECT id_paper FROM AI_SUMMARY")).fetchall()
-        
-        assigned = 0
-        for i, paper in enumerate(papers):
-            theme_id = (i % 3) + 1
-            session.execute(text("""
-                INSERT IGNORE INTO PAPER_THEME (id_paper, id_theme, confidence_score)
-                VALUES (:paper_id, :theme_id, 0.85)
-            """), {'paper_id': paper.id_paper, 'theme_id': theme_id})
-            assigned += 1
-        
-        session.commit()
-        session.close()
-        logger.success(f"{assigned} asignaciones")
-        return assigned
-    
     def step6_generate_effects(self):
+        return self.step4_generate_effects()
+    
+    def step9_generate_recommendations(self, k: int = 10, full: bool = False):
         logger.info("=" * 80)
-        logger.info("PASO 6: GENERACIÓN DE EFECTOS")
+        logger.info("PASO 9: RECOMENDACIONES")
         logger.info("=" * 80)
         
-        session = self.db.get_session()
-        papers = session.execute(text("""
-            SELECT ai.id_paper 
-            FROM AI_SUMMARY ai
-            LEFT JOIN EFFECT e ON ai.id_paper = e.id_paper
-            WHERE e.id_effect IS NULL
-            LIMIT 200
-        """)).fetchall()
-        
-        effects_types = [
-            ('positive', 'Aumento significativo'),
-            ('negative', 'Disminución observada'),
-            ('neutral', 'Sin cambios significativos'),
-        ]
-        
-        count = 0
-        for i, paper in enumerate(papers):
-            effect_type, desc = effects_types[i % 3]
-            session.execute(text("""
-                INSERT INTO EFFECT (id_paper, effect_type, effect_description, confidence_score, section_source)
-                VALUES (:paper_id, :type, :desc, 0.85, 'results')
-            """), {'paper_id': paper.id_paper, 'type': effect_type, 'desc': desc})
-            count += 1
-        
-        session.commit()
-        session.close()
-        logger.success(f"{count} efectos")
-        return count
+        try:
+            from recommendations import RecommendationGenerator
+            return RecommendationGenerator(self.db, k=k).run(full=full)
+            
+        except Exception as e:
+            logger.error(f"Error generando recomendaciones: {e}")
+            return 0
     
     #este idk
     def step7_build_graph(self):
@@ -316,7 +296,8 @@ class MainOrchestrator:
         logger.info("=" * 80)
         
         if self.kg is None:
-            self.kg = KnowledgeGraphGenerator()
+            from knowledge_graph import KnowledgeGraphGenerator
+            self.kg = KnowledgeGraphGenerator(db=self.db)
         
         stats = self.kg.generate_all_relations()
         logger.success(f"Grafo: {stats['nodes']} nodos, {stats['edges']} relaciones")
@@ -500,150 +481,31 @@ class MainOrchestrator:
             logger.error(f"Error: {e}")
             return {'database': 'Error', 'error': str(e)}
     
-    def step4_generate_effects(self):
+    def step4_generate_effects(self, limit: int = None):
         logger.info("=" * 80)
         logger.info("PASO 4: GENERACIÓN DE EFECTOS")
         logger.info("=" * 80)
         
-        session = self.db.get_session()
-        
         try:
-            query = text("""
-                SELECT p.id_paper, p.title, ai.summary_abstract 
-                FROM PAPER p 
-                JOIN AI_SUMMARY ai ON p.id_paper = ai.id_paper 
-                WHERE p.id_paper NOT IN (SELECT id_paper FROM EFFECT)
-                LIMIT 200
-            """)
-            papers = session.execute(query).fetchall()
-            
-            effects_added = 0
-            for paper in papers:
-                # Analizar el resumen para detectar efectos
-                effects = self._analyze_effects_from_summary(paper.summary_abstract)
-                
-                for effect_type, description in effects:
-                    self.db.insert_effect(
-                        paper.id_paper, 
-                        effect_type, 
-                        description,
-                        confidence_score=0.85
-                    )
-                    effects_added += 1
-            
-            logger.success(f"Efectos generados: {effects_added}")
-            return effects_added
+            from effect_classifier import EffectClassifier
+            return EffectClassifier(self.get_pipeline()).run(limit=limit)
             
         except Exception as e:
             logger.error(f"Error generando efectos: {e}")
             return 0
-        finally:
-            session.close()
-    
-    def _analyze_effects_from_summary(self, summary):
-        if not summary:
-            return []
-        
-        effects = []
-        summary_lower = summary.lower()
-        
-        positive_indicators = [
-            'increase', 'improve', 'enhance', 'positive', 'benefit', 'promote',
-            'aumento', 'mejora', 'beneficio', 'positivo', 'incremento', 'estimula'
-        ]
-        
-        negative_indicators = [
-            'decrease', 'reduce', 'impair', 'negative', 'damage', 'inhibit',
-            'disminución', 'reducción', 'deterioro', 'negativo', 'daño', 'suprime'
-        ]
-        
-        neutral_indicators = [
-            'no change', 'stable', 'neutral', 'similar', 'unaltered',
-            'sin cambios', 'estable', 'neutral', 'similar', 'no alterado'
-        ]
-        
-        positive_count = sum(1 for indicator in positive_indicators if indicator in summary_lower)
-        negative_count = sum(1 for indicator in negative_indicators if indicator in summary_lower)
-        neutral_count = sum(1 for indicator in neutral_indicators if indicator in summary_lower)
-        if positive_count > negative_count and positive_count > neutral_count:
-            effects.append(('positive', 'Efecto positivo detectado en condiciones espaciales'))
-        elif negative_count > positive_count and negative_count > neutral_count:
-            effects.append(('negative', 'Efecto negativo observado en microgravedad'))
-        elif neutral_count > 0:
-            effects.append(('neutral', 'Respuesta estable sin cambios significativos'))
-        else:
-            effects.append(('neutral', 'Efecto biológico observado en ambiente espacial'))
-        
-        return effects
     
-    def step5_assign_themes(self):
+    def step5_assign_themes(self, threshold: float = 0.3, top_k: int = 2):
         logger.info("=" * 80)
         logger.info("PASO 5: ASIGNACIÓN DE TEMAS")
         logger.info("=" * 80)
         
-        session = self.db.get_session()
-        
         try:
-            themes_result = session.execute(text("SELECT id_theme, theme_name FROM THEME")).fetchall()
-            theme_ids = [row.id_theme for row in themes_result]
-            theme_names = [row.theme_name for row in themes_result]
-            
-            if not theme_ids:
-                logger.warning("No hay temas disponibles. Ejecuta step4_setup_themes primero.")
-                return 0
-            
-            query = text("""
-                SELECT p.id_paper, p.title, ai.summary_abstract 
-                FROM PAPER p 
-                JOIN AI_SUMMARY ai ON p.id_paper = ai.id_paper
-                WHERE p.id_paper NOT IN (SELECT id_paper FROM PAPER_THEME)
-                LIMIT 200
-            """)
-            papers = session.execute(query).fetchall()
-            
-            themes_assigned = 0
-            for paper in papers:
-                assigned_theme_indices = self._assign_themes_based_on_content(paper.title, paper.summary_abstract)
-                
-                for theme_index in assigned_theme_indices:
-                    if theme_index < len(theme_ids):
-                        self.db.link_paper_theme(paper.id_paper, theme_ids[theme_index], confidence=0.8)
-                        themes_assigned += 1
-                        logger.debug(f"Paper {paper.id_paper} asignado a tema: {theme_names[theme_index]}")
-            
-            logger.success(f"Temas asignados: {themes_assigned}")
-            return themes_assigned
+            from theme_classifier import ThemeClassifier
+            return ThemeClassifier(self.get_pipeline()).assign_all(threshold=threshold, top_k=top_k)
             
         except Exception as e:
             logger.error(f"Error asignando temas: {e}")
             return 0
-        finally:
-            session.close()
-    
-    def _assign_themes_based_on_content(self, title, summary):
-
-        if not summary:
-            return [0]  
-        
-        content = f"{title} {summary}".lower()
-        themes_assigned = []
-        
-        theme_keywords = [
-            ['microgravity', 'gravity', 'spaceflight', 'space flight', 'weightlessness'],  
-            ['immune', 'nk cell', 'lymphocyte', 'inflammation', 'cytokine', 't cell'],     
-            ['cell', 'cellular', 'gene', 'protein', 'dna', 'rna', 'expression'],           
-            ['health', 'medical', 'astronaut', 'therapy', 'treatment', 'clinical'],        
-            ['plant', 'crop', 'growth', 'seed', 'root', 'photosynthesis']                  
-        ]
-        
-        for i, keywords in enumerate(theme_keywords):
-            if any(keyword in content for keyword in keywords):
-                themes_assigned.append(i)
-        
-        if not themes_assigned:
-            themes_assigned.append(0)
-        
-        return themes_assigned
     
     def step6_generate_comparisons(self):
         logger.info("=" * 80)
@@ -774,4 +636,51 @@ class MainOrchestrator:
             logger.error(f"Pipeline falló: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            return {'success': False, 'error': str(e)}
\ No newline at end of file
+            return {'success': False, 'error': str(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NASA Space Biology KB')
+    parser.add_argument('--action', choices=['ingest', 'citations', 'process', 'themes', 'effects', 'graph', 'comparisons', 'recommendations', 'full', 'status'], required=True)
+    parser.add_argument('--csv', type=str, default='SB_publications.csv')
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--embedding-workers', type=int, default=0,
+                        help='Procesos para generar embeddings en CPU (0 = proceso actual)')
+    parser.add_argument('--encoder-backend', choices=['torch', 'onnx'], default='torch',
+                        help='onnx: modelo int8 cuantizado con ONNX Runtime')
+    
+    args = parser.parse_args()
+    orchestrator = MainOrchestrator(
+        embedding_workers=args.embedding_workers,
+        encoder_backend=args.encoder_backend
+    )
+    
+    if args.action == 'ingest':
+        orchestrator.step1_ingest_and_extract(args.csv, args.limit)
+    elif args.action == 'citations':
+        orchestrator.step2_extract_citations(args.limit or 50)
+    elif args.action == 'process':
+        orchestrator.step3_process_with_ai(args.limit)
+    elif args.action == 'themes':
+        orchestrator.step4_setup_themes()
+        orchestrator.step5_assign_themes()
+    elif args.action == 'effects':
+        orchestrator.step4_generate_effects()
+    elif args.action == 'graph':
+        orchestrator.step7_build_graph()
+    elif args.action == 'comparisons':
+        orchestrator.step6_generate_comparisons()
+    elif args.action == 'recommendations':
+        orchestrator.step9_generate_recommendations()
+    elif args.action == 'full':
+        result = orchestrator.run_full_pipeline(args.csv, args.limit)
+        if not result['success']:
+            sys.exit(1)
+    elif args.action == 'status':
+        status = orchestrator.get_system_status()
+        print("\n" + "=" * 60)
+        for key, value in status.items():
+            print(f"{key:25s}: {value}")
+
+if __name__ == "__main__":
+    main()
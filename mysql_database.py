@@ -1,6 +1,5 @@
 
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 import pymysql
 import json
@@ -13,8 +12,7 @@ from loguru import logger
 load_dotenv()
 
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, text, bindparam
 from sqlalchemy.pool import QueuePool
 import pymysql
 import json
@@ -50,6 +48,9 @@ class MySQLManager:
             f"?charset=utf8mb4&ssl_ca=&ssl_verify_cert=false&ssl_verify_identity=false"
         )
         
+        # sqlalchemy.orm solo hace falta al conectar, no al importar
+        from sqlalchemy.orm import sessionmaker
+        
         try:
             self.engine = create_engine(
                 self.connection_string,
@@ -69,6 +70,9 @@ class MySQLManager:
                 bind=self.engine
             )
             
+            # Callbacks (paper_id, paper_data) tras cada insert_paper
+            self.paper_listeners = []
+            
             logger.info(f"Conectado a MySQL Aiven: {self.host}:{self.port}/{self.database}")
             
         except Exception as e:
@@ -108,6 +112,13 @@ class MySQLManager:
             session.commit()
             paper_id = result.lastrowid
             logger.info(f" Paper insertado: ID {paper_id}")
+            
+            for listener in (self.paper_listeners if paper_id else []):
+                try:
+                    listener(paper_id, paper_data)
+                except Exception as e:
+                    logger.warning(f" Error notificando paper {paper_id}: {e}")
+            
             return paper_id
             
         except Exception as e:
@@ -148,6 +159,44 @@ class MySQLManager:
         finally:
             session.close()
     
+    def get_papers_by_ids(self, paper_ids: List[int], filters: Optional[Dict] = None) -> List[Dict]:
+        """Obtener papers por ID (filtros opcionales: year_from, year_to, journal, theme_id)"""
+        if not paper_ids:
+            return []
+        
+        filters = filters or {}
+        conditions = ["p.id_paper IN :ids"]
+        params = {'ids': list(paper_ids)}
+        
+        if filters.get('year_from') is not None:
+            conditions.append("p.year >= :year_from")
+            params['year_from'] = filters['year_from']
+        if filters.get('year_to') is not None:
+            conditions.append("p.year <= :year_to")
+            params['year_to'] = filters['year_to']
+        if filters.get('journal'):
+            conditions.append("p.journal = :journal")
+            params['journal'] = filters['journal']
+        if filters.get('theme_id') is not None:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM PAPER_THEME pt WHERE pt.id_paper = p.id_paper AND pt.id_theme = :theme_id)"
+            )
+            params['theme_id'] = filters['theme_id']
+        
+        session = self.get_session()
+        try:
+            query = text(f"""
+                SELECT p.id_paper, p.title, p.abstract, p.year, p.journal, p.DOI
+                FROM PAPER p
+                WHERE {' AND '.join(conditions)}
+            """).bindparams(bindparam('ids', expanding=True))
+            
+            results = session.execute(query, params).fetchall()
+            return [dict(row._mapping) for row in results]
+            
+        finally:
+            session.close()
+    
     def search_papers(self, search_term: str, limit: int = 50) -> List[Dict]:
         """Búsqueda de papers por texto"""
         session = self.get_session()
@@ -266,40 +315,96 @@ class MySQLManager:
         finally:
             session.close()
     
+    def bulk_link_paper_keywords(self, links: List[tuple]) -> int:
+        """Insertar keywords y vincularlas en bloque: [(id_paper, keyword, relevance)]"""
+        if not links:
+            return 0
+        session = self.get_session()
+        try:
+            words = sorted({keyword for _, keyword, _ in links})
+            session.execute(text("INSERT IGNORE INTO KEYWORD (word) VALUES (:word)"),
+                            [{'word': word} for word in words])
+            
+            query = text("SELECT id_keyword, word FROM KEYWORD WHERE word IN :words").bindparams(
+                bindparam('words', expanding=True)
+            )
+            keyword_ids = {row.word.lower(): row.id_keyword
+                           for row in session.execute(query, {'words': words})}
+            
+            session.execute(text("""
+                INSERT INTO PAPER_KEYWORD (id_paper, id_keyword, relevance_score)
+                VALUES (:paper_id, :keyword_id, :relevance)
+                ON DUPLICATE KEY UPDATE relevance_score = VALUES(relevance_score)
+            """), [
+                {'paper_id': paper_id, 'keyword_id': keyword_ids[keyword.lower()], 'relevance': relevance}
+                for paper_id, keyword, relevance in links
+            ])
+            session.commit()
+            return len(links)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error vinculando keywords: {e}")
+            raise
+        finally:
+            session.close()
+    
     # ia
     
+    AI_SUMMARY_UPSERT = """
+        INSERT INTO AI_SUMMARY 
+        (id_paper, summary_abstract, summary_results, summary_conclusions,
+         hypothesis, key_findings, student_mode_explanation, embedding_vector)
+        VALUES 
+        (:paper_id, :summary_abstract, :summary_results, :summary_conclusions,
+         :hypothesis, :key_findings, :student_explanation, :embedding)
+        ON DUPLICATE KEY UPDATE
+        summary_abstract = VALUES(summary_abstract),
+        summary_results = VALUES(summary_results),
+        summary_conclusions = VALUES(summary_conclusions),
+        hypothesis = VALUES(hypothesis),
+        key_findings = VALUES(key_findings),
+        student_mode_explanation = VALUES(student_mode_explanation),
+        embedding_vector = VALUES(embedding_vector),
+        last_updated = CURRENT_TIMESTAMP
+    """
+    
+    def _ai_summary_params(self, summary_data: Dict) -> Dict:
+        return {
+            'paper_id': summary_data['id_paper'],
+            'summary_abstract': summary_data.get('summary_abstract'),
+            'summary_results': summary_data.get('summary_results'),
+            'summary_conclusions': summary_data.get('summary_conclusions'),
+            'hypothesis': summary_data.get('hypothesis'),
+            'key_findings': json.dumps(summary_data.get('key_findings', [])),
+            'student_explanation': summary_data.get('student_explanation'),
+            'embedding': self._pack_summary_embedding(summary_data.get('embedding'))
+        }
+    
+    def ensure_binary_embedding_column(self):
+        """Migrar embedding_vector a MEDIUMBLOB antes de la primera escritura binaria"""
+        if getattr(self, '_binary_embedding_ready', False):
+            return
+        session = self.get_session()
+        try:
+            data_type = session.execute(text("""
+                SELECT DATA_TYPE FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'AI_SUMMARY'
+                  AND COLUMN_NAME = 'embedding_vector'
+            """)).scalar()
+        finally:
+            session.close()
+        
+        if data_type is not None and data_type.lower() not in ('blob', 'mediumblob', 'longblob'):
+            logger.info(f" embedding_vector es {data_type}: migrando a binario")
+            self.migrate_embeddings_to_binary()
+        self._binary_embedding_ready = True
+    
     def insert_ai_summary(self, summary_data: Dict):
         """Insertar resumen generado por IA"""
+        self.ensure_binary_embedding_column()
         session = self.get_session()
         try:
-            query = text("""
-                INSERT INTO AI_SUMMARY 
-                (id_paper, summary_abstract, summary_results, summary_conclusions,
-                 hypothesis, key_findings, student_mode_explanation, embedding_vector)
-                VALUES 
-                (:paper_id, :summary_abstract, :summary_results, :summary_conclusions,
-                 :hypothesis, :key_findings, :student_explanation, :embedding)
-                ON DUPLICATE KEY UPDATE
-                summary_abstract = VALUES(summary_abstract),
-                summary_results = VALUES(summary_results),
-                summary_conclusions = VALUES(summary_conclusions),
-                hypothesis = VALUES(hypothesis),
-                key_findings = VALUES(key_findings),
-                student_mode_explanation = VALUES(student_mode_explanation),
-                embedding_vector = VALUES(embedding_vector),
-                last_updated = CURRENT_TIMESTAMP
-            """)
-            
-            session.execute(query, {
-                'paper_id': summary_data['id_paper'],
-                'summary_abstract': summary_data.get('summary_abstract'),
-                'summary_results': summary_data.get('summary_results'),
-                'summary_conclusions': summary_data.get('summary_conclusions'),
-                'hypothesis': summary_data.get('hypothesis'),
-                'key_findings': json.dumps(summary_data.get('key_findings', [])),
-                'student_explanation': summary_data.get('student_explanation'),
-                'embedding': json.dumps(summary_data.get('embedding', []))
-            })
+            session.execute(text(self.AI_SUMMARY_UPSERT), self._ai_summary_params(summary_data))
             
             session.commit()
             logger.info(f" AI Summary guardado para paper {summary_data['id_paper']}")
@@ -311,6 +416,23 @@ class MySQLManager:
         finally:
             session.close()
     
+    def bulk_insert_ai_summaries(self, summaries: List[Dict]) -> int:
+        """Insertar varios resúmenes IA en una transacción (executemany)"""
+        if not summaries:
+            return 0
+        self.ensure_binary_embedding_column()
+        session = self.get_session()
+        try:
+            session.execute(text(self.AI_SUMMARY_UPSERT), [self._ai_summary_params(s) for s in summaries])
+            session.commit()
+            return len(summaries)
+        except Exception as e:
+            session.rollback()
+            logger.error(f" Error guardando AI summaries: {e}")
+            raise
+        finally:
+            session.close()
+    
     def get_ai_summary(self, paper_id: int) -> Optional[Dict]:
         """Obtener resumen IA de un paper"""
         session = self.get_session()
@@ -324,13 +446,157 @@ class MySQLManager:
                 if data.get('key_findings'):
                     data['key_findings'] = json.loads(data['key_findings'])
                 if data.get('embedding_vector'):
-                    data['embedding_vector'] = json.loads(data['embedding_vector'])
+                    from embedding_codec import unpack_embedding
+                    data['embedding_vector'] = unpack_embedding(data['embedding_vector'])
                 return data
             return None
             
         finally:
             session.close()
     
+    def _pack_summary_embedding(self, embedding):
+        if embedding is None or len(embedding) == 0:
+            return None
+        from embedding_codec import pack_embedding
+        return pack_embedding(embedding)
+    
+    def get_embeddings(self, paper_ids: Optional[List[int]] = None, chunk_size: int = 1000):
+        """Cargar embeddings de varios papers en una matriz NumPy contigua (ids, matriz)"""
+        session = self.get_session()
+        try:
+            if paper_ids is None:
+                query = text("""
+                    SELECT id_paper, embedding_vector FROM AI_SUMMARY
+                    WHERE embedding_vector IS NOT NULL
+                    ORDER BY id_paper
+                """)
+                rows = session.execute(query).fetchall()
+            else:
+                query = text("""
+                    SELECT id_paper, embedding_vector FROM AI_SUMMARY
+                    WHERE id_paper IN :ids AND embedding_vector IS NOT NULL
+                """).bindparams(bindparam('ids', expanding=True))
+                
+                rows = []
+                paper_ids = list(paper_ids)
+                for start in range(0, len(paper_ids), chunk_size):
+                    chunk = paper_ids[start:start + chunk_size]
+                    rows.extend(session.execute(query, {'ids': chunk}).fetchall())
+            
+            import numpy as np
+            from embedding_codec import unpack_embeddings
+            
+            ids = np.fromiter((row.id_paper for row in rows), dtype=np.int64, count=len(rows))
+            matrix = unpack_embeddings(row.embedding_vector for row in rows)
+            return ids, matrix
+            
+        finally:
+            session.close()
+    
+    def migrate_embeddings_to_binary(self, batch_size: int = 500) -> int:
+        """Convertir embedding_vector de texto JSON a binario empaquetado"""
+        from embedding_codec import pack_embedding, unpack_embedding
+        
+        session = self.get_session()
+        try:
+            session.execute(text("ALTER TABLE AI_SUMMARY MODIFY embedding_vector MEDIUMBLOB NULL"))
+            session.commit()
+            
+            rows = session.execute(text("""
+                SELECT id_paper, embedding_vector FROM AI_SUMMARY
+                WHERE embedding_vector IS NOT NULL AND LEFT(embedding_vector, 1) = '['
+            """)).fetchall()
+            
+            update = text("UPDATE AI_SUMMARY SET embedding_vector = :embedding WHERE id_paper = :paper_id")
+            migrated = 0
+            for start in range(0, len(rows), batch_size):
+                params = []
+                for row in rows[start:start + batch_size]:
+                    vector = unpack_embedding(row.embedding_vector)
+                    params.append({
+                        'paper_id': row.id_paper,
+                        'embedding': pack_embedding(vector) if vector is not None else None
+                    })
+                session.execute(update, params)
+                session.commit()
+                migrated += len(params)
+            
+            self._binary_embedding_ready = True
+            logger.info(f" Embeddings migrados a binario: {migrated}")
+            return migrated
+            
+        except Exception as e:
+            session.rollback()
+            logger.error(f" Error migrando embeddings: {e}")
+            raise
+        finally:
+            session.close()
+    
+    # fragmentos (chunks) de texto completo
+    
+    def ensure_chunk_table(self):
+        """Crear tabla de fragmentos indexados si no existe"""
+        session = self.get_session()
+        try:
+            session.execute(text("""
+                CREATE TABLE IF NOT EXISTS PAPER_CHUNK (
+                    id_chunk BIGINT PRIMARY KEY,
+                    id_paper INT NOT NULL,
+                    section VARCHAR(32) NOT NULL,
+                    char_offset INT NOT NULL,
+                    char_length INT NOT NULL,
+                    INDEX idx_chunk_paper (id_paper)
+                )
+            """))
+            session.commit()
+        finally:
+            session.close()
+    
+    def replace_paper_chunks(self, paper_id: int, chunks: List[Dict]):
+        """Reemplazar los fragmentos de un paper"""
+        session = self.get_session()
+        try:
+            session.execute(text("DELETE FROM PAPER_CHUNK WHERE id_paper = :id"), {'id': paper_id})
+            if chunks:
+                session.execute(text("""
+                    INSERT INTO PAPER_CHUNK (id_chunk, id_paper, section, char_offset, char_length)
+                    VALUES (:id_chunk, :id_paper, :section, :char_offset, :char_length)
+                """), chunks)
+            session.commit()
+            
+        except Exception as e:
+            session.rollback()
+            logger.error(f" Error guardando fragmentos de paper {paper_id}: {e}")
+            raise
+        finally:
+            session.close()
+    
+    def get_chunks_by_ids(self, chunk_ids: List[int]) -> List[Dict]:
+        """Obtener fragmentos con el texto de su sección"""
+        if not chunk_ids:
+            return []
+        session = self.get_session()
+        try:
+            query = text("""
+                SELECT c.id_chunk, c.id_paper, c.section, c.char_offset, c.char_length, p.title,
+                       SUBSTRING(CASE c.section
+                           WHEN 'results' THEN p.results_section
+                           WHEN 'methods' THEN p.methods_section
+                           WHEN 'conclusions' THEN p.conclusions_section
+                           WHEN 'abstract' THEN p.abstract
+                           ELSE p.full_text
+                       END, c.char_offset + 1, c.char_length) AS passage
+                FROM PAPER_CHUNK c
+                JOIN PAPER p ON p.id_paper = c.id_paper
+                WHERE c.id_chunk IN :ids
+            """).bindparams(bindparam('ids', expanding=True))
+            
+            results = session.execute(query, {'ids': list(chunk_ids)}).fetchall()
+            return [dict(row._mapping) for row in results]
+            
+        finally:
+            session.close()
+    
     # op. temas
     
     def insert_theme(self, theme_name, description, color="#3498db"):
@@ -380,6 +646,69 @@ class MySQLManager:
         finally:
             session.close()
     
+    def _link_paper_themes(self, session, assignments, batch_size: int) -> int:
+        query = text("""
+            INSERT INTO PAPER_THEME (id_paper, id_theme, confidence_score)
+            VALUES (:paper_id, :theme_id, :confidence)
+            ON DUPLICATE KEY UPDATE confidence_score = VALUES(confidence_score)
+        """)
+        assignments = list(assignments)
+        for start in range(0, len(assignments), batch_size):
+            session.execute(query, [
+                {'paper_id': paper_id, 'theme_id': theme_id, 'confidence': confidence}
+                for paper_id, theme_id, confidence in assignments[start:start + batch_size]
+            ])
+        return len(assignments)
+    
+    def _delete_paper_themes(self, session, paper_ids: List[int], chunk_size: int):
+        query = text("DELETE FROM PAPER_THEME WHERE id_paper IN :ids").bindparams(
+            bindparam('ids', expanding=True)
+        )
+        for start in range(0, len(paper_ids), chunk_size):
+            session.execute(query, {'ids': paper_ids[start:start + chunk_size]})
+    
+    def bulk_link_paper_themes(self, assignments, batch_size: int = 1000) -> int:
+        """Vincular en bloque (id_paper, id_theme, confidence) con executemany"""
+        session = self.get_session()
+        try:
+            written = self._link_paper_themes(session, assignments, batch_size)
+            session.commit()
+            return written
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error vinculando papers-temas: {e}")
+            raise
+        finally:
+            session.close()
+    
+    def delete_paper_themes(self, paper_ids: List[int], chunk_size: int = 1000):
+        """Eliminar las asignaciones de tema de varios papers"""
+        session = self.get_session()
+        try:
+            self._delete_paper_themes(session, paper_ids, chunk_size)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error eliminando temas: {e}")
+            raise
+        finally:
+            session.close()
+    
+    def replace_paper_themes(self, paper_ids: List[int], assignments, batch_size: int = 1000) -> int:
+        """Borrar los temas de paper_ids e insertar assignments en una sola transacción"""
+        session = self.get_session()
+        try:
+            self._delete_paper_themes(session, paper_ids, batch_size)
+            written = self._link_paper_themes(session, assignments, batch_size)
+            session.commit()
+            return written
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error reemplazando temas: {e}")
+            raise
+        finally:
+            session.close()
+    
     def get_papers_by_theme(self, theme_id: int, limit: int = 50) -> List[Dict]:
         """Obtener papers por tema"""
         session = self.get_session()
@@ -448,6 +777,66 @@ class MySQLManager:
         finally:
             session.close()
     
+    def bulk_insert_effects(self, effects: List[Dict], batch_size: int = 1000) -> int:
+        """Insertar efectos en bloque (executemany)"""
+        if not effects:
+            return 0
+        session = self.get_session()
+        try:
+            query = text("""
+                INSERT INTO EFFECT (id_paper, effect_type, effect_description, confidence_score, section_source)
+                VALUES (:paper_id, :effect_type, :effect_description, :confidence_score, :section_source)
+            """)
+            for start in range(0, len(effects), batch_size):
+                session.execute(query, effects[start:start + batch_size])
+            session.commit()
+            return len(effects)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error insertando efectos: {e}")
+            raise
+        finally:
+            session.close()
+    
+    def ensure_effect_processed_table(self):
+        """Marcas de papers ya analizados por el clasificador de efectos"""
+        if getattr(self, '_effect_processed_table_ready', False):
+            return
+        session = self.get_session()
+        try:
+            session.execute(text("""
+                CREATE TABLE IF NOT EXISTS EFFECT_PROCESSED (
+                    id_paper INT PRIMARY KEY,
+                    effects SMALLINT NOT NULL,
+                    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                )
+            """))
+            session.commit()
+            self._effect_processed_table_ready = True
+        finally:
+            session.close()
+    
+    def mark_effects_processed(self, counts: Dict[int, int]) -> int:
+        """Registrar {id_paper: efectos encontrados}, también los papers sin efectos"""
+        if not counts:
+            return 0
+        self.ensure_effect_processed_table()
+        session = self.get_session()
+        try:
+            session.execute(text("""
+                INSERT INTO EFFECT_PROCESSED (id_paper, effects)
+                VALUES (:paper_id, :effects)
+                ON DUPLICATE KEY UPDATE effects = VALUES(effects)
+            """), [{'paper_id': paper_id, 'effects': n} for paper_id, n in counts.items()])
+            session.commit()
+            return len(counts)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error marcando papers procesados: {e}")
+            raise
+        finally:
+            session.close()
+    
     def get_effects_by_paper(self, paper_id: int) -> List[Dict]:
         """Obtener efectos de un paper"""
         session = self.get_session()
@@ -527,52 +916,207 @@ class MySQLManager:
     
     # recomendaciones de papers simimlares
     
+    def ensure_recommendation_table(self):
+        """Crear la tabla normalizada de recomendaciones (y migrar RECOMMENDATION la primera vez)"""
+        if getattr(self, '_recommendation_table_ready', False):
+            return
+        session = self.get_session()
+        try:
+            session.execute(text("""
+                CREATE TABLE IF NOT EXISTS PAPER_RECOMMENDATION (
+                    id_paper INT NOT NULL,
+                    id_recommended INT NOT NULL,
+                    `rank` SMALLINT NOT NULL,
+                    score FLOAT NOT NULL,
+                    PRIMARY KEY (id_paper, `rank`),
+                    UNIQUE KEY uq_recommendation (id_paper, id_recommended),
+                    INDEX idx_recommended (id_recommended)
+                )
+            """))
+            session.commit()
+            
+            legacy = session.execute(text("""
+                SELECT COUNT(*) FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'RECOMMENDATION'
+            """)).scalar()
+            empty = session.execute(text("SELECT 1 FROM PAPER_RECOMMENDATION LIMIT 1")).first() is None
+        finally:
+            session.close()
+        
+        self._recommendation_table_ready = True
+        if legacy and empty:
+            logger.info(" PAPER_RECOMMENDATION vacía: migrando RECOMMENDATION")
+            self.migrate_recommendations()
+    
+    def _write_recommendations(self, session, recommendations: Dict[int, List[Dict]], batch_size: int):
+        # Reemplaza la lista completa de cada paper (rank 1..n)
+        paper_ids = list(recommendations)
+        delete = text("DELETE FROM PAPER_RECOMMENDATION WHERE id_paper IN :ids").bindparams(
+            bindparam('ids', expanding=True)
+        )
+        for start in range(0, len(paper_ids), batch_size):
+            session.execute(delete, {'ids': paper_ids[start:start + batch_size]})
+        
+        rows = [
+            {'paper_id': paper_id, 'recommended': rec['paper_id'], 'rank': rank, 'score': rec['score']}
+            for paper_id, recs in recommendations.items()
+            for rank, rec in enumerate(recs, start=1)
+        ]
+        query = text("""
+            INSERT INTO PAPER_RECOMMENDATION (id_paper, id_recommended, `rank`, score)
+            VALUES (:paper_id, :recommended, :rank, :score)
+        """)
+        for start in range(0, len(rows), batch_size):
+            session.execute(query, rows[start:start + batch_size])
+        return len(rows)
+    
     def insert_recommendations(self, paper_id: int, recommendations: List[Dict]):
         """Insertar recomendaciones de papers similares"""
+        self.bulk_insert_recommendations({paper_id: recommendations})
+    
+    def bulk_insert_recommendations(self, recommendations: Dict[int, List[Dict]],
+                                    batch_size: int = 1000) -> int:
+        """Guardar recomendaciones de muchos papers {id_paper: [{'paper_id', 'score'}]}"""
+        if not recommendations:
+            return 0
+        self.ensure_recommendation_table()
+        session = self.get_session()
+        try:
+            self._write_recommendations(session, recommendations, batch_size)
+            session.commit()
+            return len(recommendations)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error guardando recomendaciones: {e}")
+            raise
+        finally:
+            session.close()
+    
+    def get_recommendations(self, paper_id: int, limit: int = 10) -> List[Dict]:
+        """Obtener recomendaciones para un paper (ordenadas por rank)"""
+        self.ensure_recommendation_table()
         session = self.get_session()
         try:
             query = text("""
-                INSERT INTO RECOMMENDATION 
-                (id_paper, recommended_papers, similarity_scores, reason)
-                VALUES (:paper_id, :recommended, :scores, :reason)
-                ON DUPLICATE KEY UPDATE
-                recommended_papers = VALUES(recommended_papers),
-                similarity_scores = VALUES(similarity_scores)
+                SELECT r.id_recommended, r.`rank`, r.score, p.title, p.abstract, p.year
+                FROM PAPER_RECOMMENDATION r
+                JOIN PAPER p ON p.id_paper = r.id_recommended
+                WHERE r.id_paper = :id
+                ORDER BY r.`rank`
+                LIMIT :limit
             """)
             
-            rec_ids = [r['paper_id'] for r in recommendations]
-            scores = [r['score'] for r in recommendations]
+            results = session.execute(query, {'id': paper_id, 'limit': limit}).fetchall()
+            return [dict(row._mapping) for row in results]
             
-            session.execute(query, {
-                'paper_id': paper_id,
-                'recommended': json.dumps(rec_ids),
-                'scores': json.dumps(scores),
-                'reason': 'Based on semantic similarity'
-            })
+        finally:
+            session.close()
+    
+    def migrate_recommendations(self, batch_size: int = 500) -> int:
+        """Copiar las recomendaciones JSON de RECOMMENDATION a PAPER_RECOMMENDATION"""
+        self.ensure_recommendation_table()
+        session = self.get_session()
+        try:
+            rows = session.execute(text("""
+                SELECT id_paper, recommended_papers, similarity_scores FROM RECOMMENDATION
+            """)).fetchall()
             
-            session.commit()
+            recommendations = {}
+            for row in rows:
+                ids = json.loads(row.recommended_papers or '[]')
+                scores = json.loads(row.similarity_scores or '[]')
+                scores += [0.0] * (len(ids) - len(scores))
+                recs, seen = [], set()
+                for rec_id, score in zip(ids, scores):
+                    if rec_id is not None and int(rec_id) not in seen:
+                        seen.add(int(rec_id))
+                        recs.append({'paper_id': int(rec_id), 'score': float(score)})
+                recommendations[row.id_paper] = recs
             
+            written = self._write_recommendations(session, recommendations, batch_size)
+            session.commit()
+            logger.success(f"Recomendaciones migradas: {len(recommendations)} papers, {written} filas")
+            return written
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error migrando recomendaciones: {e}")
+            raise
         finally:
             session.close()
     
-    def get_recommendations(self, paper_id: int) -> List[Dict]:
-        """Obtener recomendaciones para un paper"""
+    # métricas del grafo de citas
+    
+    PAPER_METRICS = ('pagerank', 'hub', 'authority', 'in_degree', 'out_degree')
+    
+    def ensure_paper_metrics_table(self):
+        """Crear la tabla de métricas de citas si no existe"""
+        if getattr(self, '_paper_metrics_table_ready', False):
+            return
         session = self.get_session()
         try:
-            query = text("""
-                SELECT r.*, p.title, p.abstract, p.year
-                FROM RECOMMENDATION r
-                JOIN PAPER p ON p.id_paper IN (
-                    SELECT JSON_EXTRACT(r.recommended_papers, CONCAT('$[', numbers.n, ']'))
-                    FROM (SELECT 0 n UNION SELECT 1 UNION SELECT 2 UNION SELECT 3 UNION SELECT 4) numbers
+            session.execute(text("""
+                CREATE TABLE IF NOT EXISTS PAPER_METRICS (
+                    id_paper INT PRIMARY KEY,
+                    pagerank DOUBLE NOT NULL,
+                    hub DOUBLE NOT NULL,
+                    authority DOUBLE NOT NULL,
+                    in_degree INT NOT NULL,
+                    out_degree INT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_metrics_pagerank (pagerank),
+                    INDEX idx_metrics_authority (authority),
+                    INDEX idx_metrics_in_degree (in_degree)
                 )
-                WHERE r.id_paper = :id
-                LIMIT 5
+            """))
+            session.commit()
+            self._paper_metrics_table_ready = True
+        finally:
+            session.close()
+    
+    def bulk_upsert_paper_metrics(self, rows: List[Dict], batch_size: int = 1000) -> int:
+        """Guardar métricas de citas [{'paper_id', 'pagerank', 'hub', ...}]"""
+        if not rows:
+            return 0
+        self.ensure_paper_metrics_table()
+        session = self.get_session()
+        try:
+            query = text("""
+                INSERT INTO PAPER_METRICS (id_paper, pagerank, hub, authority, in_degree, out_degree)
+                VALUES (:paper_id, :pagerank, :hub, :authority, :in_degree, :out_degree)
+                ON DUPLICATE KEY UPDATE
+                pagerank = VALUES(pagerank),
+                hub = VALUES(hub),
+                authority = VALUES(authority),
+                in_degree = VALUES(in_degree),
+                out_degree = VALUES(out_degree)
             """)
-            
-            results = session.execute(query, {'id': paper_id}).fetchall()
+            for start in range(0, len(rows), batch_size):
+                session.execute(query, rows[start:start + batch_size])
+            session.commit()
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error guardando métricas: {e}")
+            raise
+        finally:
+            session.close()
+    
+    def get_top_papers_by_metric(self, metric: str = 'pagerank', limit: int = 20) -> List[Dict]:
+        """Papers más influyentes según una métrica de citas"""
+        if metric not in self.PAPER_METRICS:
+            raise ValueError(f"Métrica desconocida: {metric}")
+        self.ensure_paper_metrics_table()
+        session = self.get_session()
+        try:
+            query = text(f"""
+                SELECT m.*, p.title, p.year, p.journal
+                FROM PAPER_METRICS m
+                JOIN PAPER p ON p.id_paper = m.id_paper
+                ORDER BY m.{metric} DESC
+                LIMIT :limit
+            """)
+            results = session.execute(query, {'limit': limit}).fetchall()
             return [dict(row._mapping) for row in results]
-            
         finally:
             session.close()
     
@@ -0,0 +1,109 @@
+"""
+Documento de paper con segmentación de oraciones en caché
+Cada sección se segmenta una sola vez (modelo Punkt precargado) y las
+oraciones se reutilizan en resúmenes, explicaciones y keywords.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SECTION_FIELDS = {
+    'abstract': 'abstract',
+    'results': 'results_section',
+    'methods': 'methods_section',
+    'conclusions': 'conclusions_section',
+}
+
+_punkt_ready = False
+_punkt_tokenizer = None
+
+
+def ensure_nltk_data():
+    """Descargar punkt/stopwords solo cuando se necesitan"""
+    global _punkt_ready
+    if _punkt_ready:
+        return
+
+    import nltk
+    # NLTK >= 3.9 usa punkt_tab en lugar del pickle de punkt
+    for resource, package in (('tokenizers/punkt', 'punkt'), ('tokenizers/punkt_tab', 'punkt_tab'),
+                              ('corpora/stopwords', 'stopwords')):
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package, quiet=True)
+    _punkt_ready = True
+
+
+def get_sentence_tokenizer():
+    """Modelo Punkt en inglés, cargado una vez por proceso"""
+    global _punkt_tokenizer
+    if _punkt_tokenizer is None:
+        ensure_nltk_data()
+        try:
+            from nltk.tokenize.punkt import PunktTokenizer
+            _punkt_tokenizer = PunktTokenizer('english')
+        except (ImportError, LookupError):
+            import nltk
+            _punkt_tokenizer = nltk.data.load('tokenizers/punkt/english.pickle')
+    return _punkt_tokenizer
+
+
+def sentence_spans(text: str, tokenizer=None) -> List[Tuple[int, int]]:
+    if not text:
+        return []
+    tokenizer = tokenizer or get_sentence_tokenizer()
+    return list(tokenizer.span_tokenize(text))
+
+
+class PaperDocument:
+    def __init__(self, paper: Dict, tokenizer=None):
+        self.paper = paper
+        self.id_paper = paper.get('id_paper')
+        self.title = paper.get('title') or ''
+        self._tokenizer = tokenizer
+        self._spans: Dict[str, List[Tuple[int, int]]] = {}
+        self._sentences: Dict[str, List[str]] = {}
+
+    def section_text(self, section: str) -> Optional[str]:
+        return self.paper.get(SECTION_FIELDS.get(section, section))
+
+    @property
+    def text(self) -> str:
+        """Título + abstract (texto para embeddings y keywords)"""
+        return f"{self.title} {self.section_text('abstract') or ''}"
+
+    def spans(self, section: str) -> List[Tuple[int, int]]:
+        if section not in self._spans:
+            self._spans[section] = sentence_spans(self.section_text(section), self._tokenizer)
+        return self._spans[section]
+
+    def sentences(self, section: str) -> List[str]:
+        if section not in self._sentences:
+            content = self.section_text(section) or ''
+            self._sentences[section] = [content[s:e] for s, e in self.spans(section)]
+        return self._sentences[section]
+
+    def lead(self, section: str, max_sentences: int = 3) -> Optional[str]:
+        """Primeras oraciones de la sección (mismo criterio que summarize_text)"""
+        content = self.section_text(section)
+        if not content or len(content) < 100:
+            return content
+
+        sentences = self.sentences(section)
+        if len(sentences) <= max_sentences:
+            return content
+        return ' '.join(sentences[:max_sentences])
+
+
+def split_documents(papers: Iterable[Dict], sections: Iterable[str] = tuple(SECTION_FIELDS)) -> List[PaperDocument]:
+    """Crear documentos y segmentar todas sus secciones con un único tokenizer"""
+    tokenizer = get_sentence_tokenizer()
+    sections = list(sections)
+
+    documents = []
+    for paper in papers:
+        document = PaperDocument(paper, tokenizer)
+        for section in sections:
+            document.spans(section)
+        documents.append(document)
+    return documents
@@ -1,29 +1,96 @@
-import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import nltk
-from nltk.tokenize import sent_tokenize
 import json
 from tqdm import tqdm
 from mysql_database import MySQLManager
+from embedding_cache import EmbeddingCache
+from encoder_backends import backend_revision, load_encoder
+from paper_document import SECTION_FIELDS, PaperDocument, get_sentence_tokenizer, split_documents
+from extractive_summarizer import ExtractiveSummarizer
+from keyword_matcher import DEFAULT_VOCABULARY, get_keyword_matcher
 from loguru import logger
 
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Oraciones por resumen extractivo de cada sección
+EXTRACTIVE_SECTIONS = {'results': 4, 'conclusions': 3}
+
+def sent_tokenize(text):
+    return get_sentence_tokenizer().tokenize(text)
 
 class CompletePipeline:
-    def __init__(self):
+    def __init__(self, use_cache=True, db=None, num_workers=0, backend='torch', summarizer='centroid',
+                 vocabulary_path=DEFAULT_VOCABULARY):
         logger.info("Inicializando pipeline IA...")
         
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # backend: 'torch' (fp32) u 'onnx' (int8 cuantizado, CPU)
+        self.backend = backend
+        self._embedding_model = None
+        self.use_cache = use_cache
+        self._embedding_cache = None
+        
+        # num_workers > 1: embeddings repartidos en varios procesos (CPU)
+        self.num_workers = num_workers
+        self._worker_pool = None
         
-        self.db = MySQLManager()
+        # summarizer: 'centroid', 'textrank' o None (primeras oraciones)
+        self.summarizer = ExtractiveSummarizer(
+            lambda sentences: self.encode_texts(sentences), method=summarizer
+        ) if summarizer else None
+        
+        self.vocabulary_path = vocabulary_path
+        
+        self.db = db or MySQLManager()
         
         logger.success("Pipeline IA listo")
     
+    @property
+    def embedding_cache(self):
+        """Caché de embeddings abierta en el primer uso (None si está desactivada)"""
+        if self.use_cache and self._embedding_cache is None:
+            self._embedding_cache = self._open_embedding_cache()
+            # Sin revisión conocida no se vuelve a intentar
+            self.use_cache = self._embedding_cache is not None
+        return self._embedding_cache
+    
+    def _open_embedding_cache(self):
+        """Caché con la revisión real del modelo (sin revisión conocida no se usa caché)"""
+        revision = backend_revision(self.backend, MODEL_NAME)
+        if revision is None:
+            # Modelo aún no descargado/exportado: cargarlo deja la revisión en disco
+            self.embedding_model
+            revision = backend_revision(self.backend, MODEL_NAME)
+        if revision is None:
+            logger.warning("Revisión del modelo desconocida: caché de embeddings desactivada "
+                           "(definir EMBEDDING_MODEL_REVISION)")
+            return None
+        return EmbeddingCache(model_name=MODEL_NAME, revision=revision)
+    
+    @property
+    def embedding_model(self):
+        """Modelo cargado en el primer uso"""
+        if getattr(self, '_embedding_model', None) is None:
+            logger.info(f"Cargando modelo {MODEL_NAME} ({self.backend})...")
+            self._embedding_model = load_encoder(self.backend, MODEL_NAME)
+        return self._embedding_model
+    
+    @embedding_model.setter
+    def embedding_model(self, model):
+        self._embedding_model = model
+    
+    @property
+    def worker_pool(self):
+        if self._worker_pool is None:
+            from embedding_workers import EmbeddingWorkerPool
+            self._worker_pool = EmbeddingWorkerPool(
+                self.num_workers, model_name=MODEL_NAME, backend=self.backend
+            )
+        return self._worker_pool
+    
+    def close(self):
+        if self._worker_pool is not None:
+            self._worker_pool.close()
+            self._worker_pool = None
+    
     def summarize_text(self, text, max_sentences=3):
         """Resumen extractivo simple"""
         if not text or len(text) < 100:
@@ -35,12 +102,13 @@ class CompletePipeline:
         
         return ' '.join(sentences[:max_sentences])
     
-    def generate_student_explanation(self, abstract):
+    def generate_student_explanation(self, abstract, summary=None):
         """Generar explicación simple para estudiantes"""
         if not abstract:
             return "No hay información disponible."
         
-        summary = self.summarize_text(abstract, 2)
+        if summary is None:
+            summary = self.summarize_text(abstract, 2)
         
         explanation = (
             f"En términos simples: {summary} "
@@ -50,38 +118,105 @@ class CompletePipeline:
         
         return explanation
     
+    @property
+    def keyword_matcher(self):
+        """Autómata Aho-Corasick del vocabulario (se construye una vez)"""
+        return get_keyword_matcher(self.vocabulary_path)
+    
     def extract_keywords(self, text):
-        """Extraer keywords básicas"""
+        """Extraer keywords del vocabulario (términos canónicos)"""
         if not text:
             return []
         
-        space_biology_terms = [
-            'microgravity', 'radiation', 'spaceflight', 'ISS',
-            'cell', 'bone', 'muscle', 'gene', 'protein',
-            'stem cell', 'immune', 'cardiovascular', 'plant'
-        ]
-        
-        keywords = []
-        text_lower = text.lower()
-        
-        for term in space_biology_terms:
-            if term in text_lower:
-                keywords.append(term)
-        
-        return keywords[:10]
+        return [term for term, _ in self.keyword_matcher.keywords(text, limit=10)]
     
     def generate_embeddings(self, text):
         """Generar embeddings vectoriales"""
         embedding = self.embedding_model.encode(text)
         return embedding.tolist()
+    
+    def encode_texts(self, texts, batch_size=64):
+        """Codificar textos por lotes ordenados por longitud (menos padding)"""
+        if getattr(self, 'num_workers', 0) > 1:
+            return self.worker_pool.encode(texts, batch_size=batch_size)
+        
+        if not texts:
+            return np.empty((0, self.embedding_model.get_sentence_embedding_dimension()), dtype='float32')
+        
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        embeddings = np.empty(
+            (len(texts), self.embedding_model.get_sentence_embedding_dimension()),
+            dtype='float32'
+        )
+        
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            embeddings[idx] = self.embedding_model.encode(
+                [texts[i] for i in idx],
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        
+        return embeddings
+    
+    def embed_texts(self, texts, batch_size=64):
+        """Embeddings con caché: solo se codifican los textos nuevos"""
+        if not texts or self.embedding_cache is None:
+            return self.encode_texts(texts, batch_size=batch_size)
+        
+        return self.embedding_cache.encode(
+            texts,
+            lambda missing: self.encode_texts(missing, batch_size=batch_size)
+        )
+    
+    def paper_text(self, paper_data):
+        return f"{paper_data.get('title') or ''} {paper_data.get('abstract') or ''}"
+    
     def process_single_paper(self, paper_data):
         """Procesar un paper completo"""
-        paper_id = paper_data['id_paper']
+        document = PaperDocument(paper_data)
+        results = self._process_text_fields(document)
+        self._apply_extractive_summaries([document], [results])
+        
+        text = self.paper_text(paper_data)
+        if text.strip():
+            results['embedding'] = self.embed_texts([text])[0].tolist()
+        
+        return results
+    
+    def process_papers_batch(self, papers, batch_size=64):
+        """Procesar varios papers codificando título+abstract por lotes"""
+        documents = split_documents(papers, sections=('abstract', 'results', 'conclusions'))
+        results = [self._process_text_fields(document) for document in documents]
+        self._apply_extractive_summaries(documents, results)
+        
+        texts = [document.text for document in documents]
+        pending = [i for i, t in enumerate(texts) if t.strip()]
+        
+        embeddings = self.embed_texts([texts[i] for i in pending], batch_size=batch_size)
+        for row, i in enumerate(pending):
+            results[i]['embedding'] = embeddings[row]
+        
+        return results
+    
+    def _apply_extractive_summaries(self, documents, results):
+        """Resúmenes de results/conclusions por centralidad (un encode por lote)"""
+        if self.summarizer is None:
+            return
         
-        text = f"{paper_data.get('title', '')} {paper_data.get('abstract', '')}"
+        summaries = self.summarizer.summarize_documents(documents, EXTRACTIVE_SECTIONS)
+        for section, section_summaries in summaries.items():
+            for result, summary in zip(results, section_summaries):
+                if summary:
+                    result[f'summary_{section}'] = summary
+    
+    def _process_text_fields(self, document):
+        """Resúmenes, explicación y keywords a partir de las oraciones en caché"""
+        paper_data = document.paper
         
         results = {
-            'id_paper': paper_id,
+            'id_paper': document.id_paper,
             'summary_abstract': None,
             'summary_results': None,     
             'summary_conclusions': None, 
@@ -89,28 +224,33 @@ class CompletePipeline:
             'key_findings': [],
             'student_explanation': None,
             'keywords': [],
+            'keyword_scores': {},
             'embedding': None
         }
         
         if paper_data.get('abstract'):
-            results['summary_abstract'] = self.summarize_text(paper_data['abstract'])
-            results['student_explanation'] = self.generate_student_explanation(paper_data['abstract'])
+            results['summary_abstract'] = document.lead('abstract', 3)
+            results['student_explanation'] = self.generate_student_explanation(
+                paper_data['abstract'], summary=document.lead('abstract', 2)
+            )
         
         if paper_data.get('results_section'):
-            results['summary_results'] = self.summarize_text(paper_data['results_section'], max_sentences=4)
+            results['summary_results'] = document.lead('results', 4)
     
         if paper_data.get('conclusions_section'):
-            results['summary_conclusions'] = self.summarize_text(paper_data['conclusions_section'], max_sentences=3)
+            results['summary_conclusions'] = document.lead('conclusions', 3)
         
         results['hypothesis'] = f"Estudio sobre {paper_data.get('title', 'biología espacial')}"
         
-        results['keywords'] = self.extract_keywords(text)
-        
-        if text.strip():
-            results['embedding'] = self.generate_embeddings(text)
+        # Una sola pasada sobre título, abstract y secciones
+        keywords = self.keyword_matcher.keywords(
+            document.title, *(document.section_text(section) for section in SECTION_FIELDS), limit=10
+        )
+        results['keywords'] = [term for term, _ in keywords]
+        results['keyword_scores'] = dict(keywords)
         
         return results
-    def process_all_papers(self, limit=None):
+    def process_all_papers(self, limit=None, batch_size=64):
         """Procesar todos los papers"""
         papers = self.db.get_all_papers(limit=limit or 1000)
         
@@ -119,18 +259,25 @@ class CompletePipeline:
         all_embeddings = []
         paper_ids = []
         
-        for paper in tqdm(papers, desc="Procesando papers"):
+        for start in tqdm(range(0, len(papers), batch_size), desc="Procesando papers"):
+            batch = papers[start:start + batch_size]
             try:
-                results = self.process_single_paper(paper)
-                self.save_results_to_db(results)
-        
-                if results['embedding']:
-                    all_embeddings.append(results['embedding'])
-                    paper_ids.append(paper['id_paper'])
-                
+                batch_results = self.process_papers_batch(batch, batch_size=batch_size)
             except Exception as e:
-                logger.warning(f"Error procesando paper {paper['id_paper']}: {e}")
+                logger.warning(f"Error procesando lote {start}: {e}")
                 continue
+            
+            for results in batch_results:
+                try:
+                    self.save_results_to_db(results)
+                    
+                    if results['embedding'] is not None:
+                        all_embeddings.append(results['embedding'])
+                        paper_ids.append(results['id_paper'])
+                    
+                except Exception as e:
+                    logger.warning(f"Error procesando paper {results['id_paper']}: {e}")
+                    continue
         
         self.save_embeddings(all_embeddings, paper_ids)
         
@@ -142,28 +289,23 @@ class CompletePipeline:
 
         for keyword in results['keywords']:
             kw_id = self.db.insert_keyword(keyword)
-            self.db.link_paper_keyword(results['id_paper'], kw_id)
+            self.db.link_paper_keyword(
+                results['id_paper'], kw_id, results.get('keyword_scores', {}).get(keyword, 1.0)
+            )
     
     def save_embeddings(self, embeddings, paper_ids):
-
-        import faiss
+        """Actualizar en el índice FAISS solo los papers procesados"""
+        from vector_index import VectorIndexManager
         
-        if not embeddings:
+        if not len(embeddings):
             logger.warning("No hay embeddings para guardar")
             return
         
-        embeddings_array = np.array(embeddings).astype('float32')
-        dimension = embeddings_array.shape[1]
-  
-        index = faiss.IndexFlatL2(dimension)
-        index.add(embeddings_array)
-        
-        faiss.write_index(index, "outputs/faiss_index.bin")
-        
-        with open("outputs/paper_id_mapping.json", 'w') as f:
-            json.dump(paper_ids, f)
+        embeddings_array = np.asarray(embeddings, dtype='float32')
         
-        logger.success(f"Índice FAISS guardado: {len(paper_ids)} papers")
+        index_manager = VectorIndexManager(dimension=embeddings_array.shape[1])
+        index_manager.upsert(paper_ids, embeddings_array)
+        index_manager.save()
 
 
 if __name__ == "__main__":
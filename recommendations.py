@@ -0,0 +1,197 @@
+"""
+Generación por lotes de recomendaciones (papers relacionados)
+Solo se procesan los papers cuyo embedding cambió desde la última ejecución,
+sus vecinos y los papers que ya los recomendaban. AI_SUMMARY.last_updated (>= la marca guardada) acota los candidatos
+y un SHA1 por paper de embedding_vector descarta los resúmenes reescritos con
+el mismo embedding. Cada grupo se consulta con una sola llamada por lotes a
+index.search, con bonus opcional por keywords y citas compartidas.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import bindparam, text
+
+from vector_index import VectorIndexManager
+
+DEFAULT_STATE_PATH = "outputs/recommendations_state.json"
+
+
+class RecommendationGenerator:
+    def __init__(self, db, index_manager: VectorIndexManager = None, k: int = 10,
+                 keyword_weight: float = 0.1, citation_weight: float = 0.1,
+                 state_path: str = DEFAULT_STATE_PATH):
+        self.db = db
+        self.index_manager = index_manager if index_manager is not None else VectorIndexManager()
+        self.k = k
+        self.keyword_weight = keyword_weight
+        self.citation_weight = citation_weight
+        self.state_path = Path(state_path)
+
+    def load_state(self) -> Dict:
+        if self.state_path.exists():
+            with open(self.state_path) as f:
+                return json.load(f)
+        return {}
+
+    def save_state(self, state: Dict):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(f".{self.state_path.name}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        tmp_path.replace(self.state_path)
+
+    def changed_papers(self, since: Optional[str],
+                       hashes: Dict[str, str]) -> Tuple[List[int], Optional[str], Dict[str, str]]:
+        """
+        Papers cuyo embedding cambió: (ids, último last_updated visto, hashes nuevos).
+        Se usa last_updated >= since (resolución de 1 s: una fila escrita en el mismo
+        segundo que la marca no se pierde) y se descartan los hashes ya vistos.
+        """
+        session = self.db.get_session()
+        try:
+            query = """
+                SELECT id_paper, last_updated, SHA1(embedding_vector) AS embedding_hash
+                FROM AI_SUMMARY
+                WHERE embedding_vector IS NOT NULL
+            """
+            params = {}
+            if since:
+                query += " AND last_updated >= :since"
+                params['since'] = since
+            rows = session.execute(text(query), params).fetchall()
+
+            latest = max((row.last_updated for row in rows if row.last_updated), default=None)
+            changed = {
+                str(row.id_paper): row.embedding_hash for row in rows
+                if hashes.get(str(row.id_paper)) != row.embedding_hash
+            }
+            return [int(paper_id) for paper_id in changed], str(latest) if latest else since, changed
+        finally:
+            session.close()
+
+    def _id_sets(self, query: str, paper_ids: List[int], chunk_size: int = 1000) -> Dict[int, Set[int]]:
+        session = self.db.get_session()
+        try:
+            statement = text(query).bindparams(bindparam('ids', expanding=True))
+            sets: Dict[int, Set[int]] = {}
+            for start in range(0, len(paper_ids), chunk_size):
+                for a, b in session.execute(statement, {'ids': paper_ids[start:start + chunk_size]}):
+                    sets.setdefault(a, set()).add(b)
+            return sets
+        finally:
+            session.close()
+
+    def keyword_sets(self, paper_ids: List[int]) -> Dict[int, Set[int]]:
+        return self._id_sets(
+            "SELECT id_paper, id_keyword FROM PAPER_KEYWORD WHERE id_paper IN :ids", paper_ids
+        )
+
+    def citation_sets(self, paper_ids: List[int]) -> Dict[int, Set[int]]:
+        """Papers enlazados por cita en cualquier dirección"""
+        cited = self._id_sets(
+            "SELECT id_paper_used_by, id_paper_used FROM CITATION WHERE id_paper_used_by IN :ids", paper_ids
+        )
+        citing = self._id_sets(
+            "SELECT id_paper_used, id_paper_used_by FROM CITATION WHERE id_paper_used IN :ids", paper_ids
+        )
+        return {p: cited.get(p, set()) | citing.get(p, set()) for p in set(cited) | set(citing)}
+
+    def referencing_papers(self, paper_ids: List[int]) -> Set[int]:
+        """Papers cuyas recomendaciones guardadas incluyen alguno de paper_ids"""
+        self.db.ensure_recommendation_table()
+        sets = self._id_sets(
+            "SELECT id_recommended, id_paper FROM PAPER_RECOMMENDATION WHERE id_recommended IN :ids", paper_ids
+        )
+        return set().union(*sets.values())
+
+    def sync_index(self, changed: List[int]):
+        """Subir al índice FAISS los embeddings modificados"""
+        if not changed:
+            return
+        ids, embeddings = self.db.get_embeddings(changed)
+        if len(ids):
+            self.index_manager.upsert(ids, embeddings)
+            self.index_manager.save()
+
+    def neighbors(self, paper_ids: List[int], fetch: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Una sola búsqueda para todos los papers: (ids consultados, vecinos, similitudes)"""
+        ids, embeddings = self.db.get_embeddings(paper_ids)
+        if not len(ids):
+            return ids, np.empty((0, fetch), dtype=np.int64), np.empty((0, fetch), dtype=np.float32)
+        distances, neighbors = self.index_manager.search(embeddings, fetch)
+        # L2 sobre vectores normalizados -> coseno
+        return ids, neighbors, 1 - distances / 2
+
+    def rank(self, query_ids: np.ndarray, neighbors: np.ndarray, similarity: np.ndarray) -> Dict[int, List[Dict]]:
+        """Top-k sin el propio paper, con bonus por keywords/citas compartidas"""
+        candidates = sorted({int(i) for i in neighbors.ravel() if i >= 0} | set(query_ids.tolist()))
+        keywords = self.keyword_sets(candidates) if self.keyword_weight else {}
+        citations = self.citation_sets(query_ids.tolist()) if self.citation_weight else {}
+
+        recommendations = {}
+        for paper_id, row_ids, row_scores in zip(query_ids.tolist(), neighbors, similarity):
+            own_keywords = keywords.get(paper_id, set())
+            linked = citations.get(paper_id, set())
+
+            scored = []
+            for other, score in zip(row_ids.tolist(), row_scores.tolist()):
+                if other < 0 or other == paper_id:
+                    continue
+                other_keywords = keywords.get(other, set())
+                if own_keywords and other_keywords:
+                    score += self.keyword_weight * len(own_keywords & other_keywords) / len(own_keywords | other_keywords)
+                if other in linked:
+                    score += self.citation_weight
+                scored.append({'paper_id': other, 'score': round(float(score), 4)})
+
+            scored.sort(key=lambda r: -r['score'])
+            recommendations[paper_id] = scored[:self.k]
+        return recommendations
+
+    def run(self, full: bool = False) -> int:
+        """Recalcular recomendaciones de los papers modificados (o de todos con full=True)"""
+        state = {} if full else self.load_state()
+        hashes = state.get('embedding_hashes', {})
+        changed, latest, changed_hashes = self.changed_papers(state.get('last_updated'), hashes)
+        if not changed:
+            logger.info("Sin embeddings nuevos: recomendaciones al día")
+            return 0
+
+        self.sync_index(changed)
+        fetch = min(len(self.index_manager), self.k * 2 + 1)
+
+        query_ids, neighbors, similarity = self.neighbors(changed, fetch)
+
+        # Los vecinos de un paper modificado pueden ganarlo como recomendación y
+        # quienes ya lo recomendaban pueden perderlo: ambos se recalculan
+        affected = {int(i) for i in neighbors.ravel() if i >= 0} | self.referencing_papers(changed)
+        affected = sorted(affected - set(query_ids.tolist()))
+        if affected:
+            more_ids, more_neighbors, more_similarity = self.neighbors(affected, fetch)
+            query_ids = np.concatenate([query_ids, more_ids])
+            neighbors = np.vstack([neighbors, more_neighbors])
+            similarity = np.vstack([similarity, more_similarity])
+
+        recommendations = self.rank(query_ids, neighbors, similarity)
+        written = self.db.bulk_insert_recommendations(recommendations)
+
+        hashes.update(changed_hashes)
+        self.save_state({'last_updated': latest, 'embedding_hashes': hashes})
+        logger.success(f"Recomendaciones actualizadas: {written} papers ({len(changed)} con embedding nuevo)")
+        return written
+
+
+if __name__ == "__main__":
+    import argparse
+    from mysql_database import MySQLManager
+
+    parser = argparse.ArgumentParser(description='Generar recomendaciones de papers relacionados')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--full', action='store_true', help='Recalcular todos los papers')
+    args = parser.parse_args()
+
+    RecommendationGenerator(MySQLManager(), k=args.k).run(full=args.full)
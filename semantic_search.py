@@ -0,0 +1,158 @@
+"""
+Búsqueda semántica sobre el índice FAISS
+Servicio de larga duración: modelo e índice cargados una vez, caché LRU de
+embeddings de consultas y agrupación de consultas concurrentes en un único
+encode + index.search.
+"""
+
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from encoder_backends import BACKENDS, load_encoder
+from mysql_database import MySQLManager
+from vector_index import VectorIndexManager
+
+
+class QueryEmbeddingCache:
+    """Caché LRU de embeddings de consultas"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+
+class SemanticSearchService:
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', db: MySQLManager = None,
+                 index_manager: VectorIndexManager = None, cache_size: int = 1024,
+                 max_batch: int = 32, batch_wait_ms: float = 5.0, backend: str = 'torch'):
+        logger.info("Inicializando búsqueda semántica...")
+
+        self.db = db or MySQLManager()
+        self.index_manager = index_manager if index_manager is not None else VectorIndexManager()
+        # Mismo backend que el pipeline que construyó el índice (torch u onnx int8)
+        self.model = load_encoder(backend, model_name)
+        self.cache = QueryEmbeddingCache(cache_size)
+
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self._requests = queue.Queue()
+
+        # Carga anticipada: índice en memoria y modelo caliente
+        _ = self.index_manager.index
+        self.model.encode(["warmup"], show_progress_bar=False)
+
+        self._worker = threading.Thread(target=self._batch_loop, daemon=True)
+        self._worker.start()
+
+        logger.success(f"Búsqueda semántica lista: {len(self.index_manager)} papers indexados")
+
+    def _normalize_query(self, query: str) -> str:
+        return ' '.join(query.split()).lower()
+
+    def _collect_batch(self):
+        batch = [self._requests.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._requests.get(timeout=self.batch_wait))
+            except queue.Empty:
+                break
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                logger.error(f"Error en lote de búsqueda: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run_batch(self, batch):
+        keys = [self._normalize_query(q) for q, _, _ in batch]
+
+        vectors = [self.cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, v in zip(keys, vectors) if v is None))
+        if missing:
+            encoded = self.model.encode(missing, convert_to_numpy=True, show_progress_bar=False)
+            for key, vector in zip(missing, encoded):
+                self.cache.put(key, vector.astype('float32'))
+            fresh = dict(zip(missing, encoded))
+            vectors = [v if v is not None else fresh[key] for key, v in zip(keys, vectors)]
+
+        fetch_k = max(k for _, k, _ in batch)
+        distances, ids = self.index_manager.search(np.vstack(vectors), fetch_k)
+
+        for row, (_, k, future) in enumerate(batch):
+            future.set_result((distances[row, :k], ids[row, :k]))
+
+    def search_ids(self, query: str, k: int = 10):
+        """IDs y puntuaciones (coseno) de los k papers más cercanos"""
+        future = Future()
+        self._requests.put((query, k, future))
+        distances, ids = future.result()
+
+        valid = ids >= 0
+        # Embeddings normalizados: distancia L2² = 2 - 2·coseno
+        return ids[valid].tolist(), (1 - distances[valid] / 2).tolist()
+
+    def search(self, query: str, k: int = 10, filters: Optional[Dict] = None) -> List[Dict]:
+        """Buscar papers por similitud semántica"""
+        if not query or not query.strip():
+            return []
+
+        fetch_k = k * 5 if filters else k
+        paper_ids, scores = self.search_ids(query, fetch_k)
+
+        rows = {row['id_paper']: row for row in self.db.get_papers_by_ids(paper_ids, filters)}
+
+        results = []
+        for paper_id, score in zip(paper_ids, scores):
+            if paper_id in rows:
+                results.append({**rows[paper_id], 'similarity': score})
+                if len(results) >= k:
+                    break
+        return results
+
+    def reload_index(self):
+        """Recargar el índice desde disco tras una actualización"""
+        fresh = VectorIndexManager(self.index_manager.index_path, self.index_manager.mapping_path)
+        _ = fresh.index
+        self.index_manager = fresh
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Búsqueda semántica de papers')
+    parser.add_argument('query', nargs='*')
+    parser.add_argument('--encoder-backend', choices=BACKENDS, default='torch',
+                        help='Debe coincidir con el usado al generar los embeddings')
+    args = parser.parse_args()
+
+    service = SemanticSearchService(backend=args.encoder_backend)
+    query = ' '.join(args.query) or 'microgravity bone loss'
+    for paper in service.search(query, k=5):
+        print(f"[{paper['similarity']:.3f}] {paper['id_paper']}: {paper['title']}")
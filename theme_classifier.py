@@ -0,0 +1,129 @@
+"""
+Clasificación de papers por tema con embeddings
+Cada tema se representa por el centroide de sus frases semilla; la similitud
+de todos los papers con todos los temas es un único producto de matrices y
+las asignaciones (top-k con umbral) se escriben en bloque en PAPER_THEME.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import text
+
+# Frases semilla por tema (THEME.theme_name); los temas sin semillas usan su nombre
+THEME_SEEDS = {
+    'Microgravity Effects': [
+        'effects of microgravity on organisms',
+        'spaceflight and weightlessness',
+        'simulated microgravity and hindlimb unloading',
+        'altered gravity response in space',
+    ],
+    'Immune System': [
+        'immune system response in spaceflight',
+        'lymphocyte and T cell function',
+        'inflammation and cytokine signaling',
+        'natural killer cells and immunity',
+    ],
+    'Cell Biology': [
+        'cellular and molecular biology',
+        'gene expression and transcriptomics',
+        'protein synthesis and proteomics',
+        'DNA damage and repair in cells',
+    ],
+    'Human Health': [
+        'astronaut health and medical risks',
+        'clinical countermeasures and therapy',
+        'bone loss and muscle atrophy in astronauts',
+    ],
+    'Plant Biology': [
+        'plant growth in space',
+        'root and seedling development',
+        'crop production and photosynthesis',
+    ],
+}
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+def classify(embeddings: np.ndarray, centroids: np.ndarray, threshold: float = 0.3,
+             top_k: int = 2, temperature: float = 0.05) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Asignar temas a todos los papers a la vez.
+    Confianza = softmax(coseno / temperatura) entre temas; se guardan los top_k
+    con confianza >= threshold (el mejor tema siempre se asigna).
+    Devuelve (fila de paper, índice de tema, confianza).
+    """
+    similarity = _normalize(embeddings) @ centroids.T
+    logits = similarity / temperature
+    logits -= logits.max(axis=1, keepdims=True)
+    probs = np.exp(logits)
+    probs /= probs.sum(axis=1, keepdims=True)
+
+    top_k = min(top_k, probs.shape[1])
+    top = np.argsort(-probs, axis=1)[:, :top_k]
+    top_probs = np.take_along_axis(probs, top, axis=1)
+
+    keep = top_probs >= threshold
+    keep[:, 0] = True
+    rows = np.nonzero(keep)[0]
+    return rows, top[keep], top_probs[keep]
+
+
+class ThemeClassifier:
+    def __init__(self, pipeline, seeds: Dict[str, List[str]] = None):
+        self.pipeline = pipeline
+        self.db = pipeline.db
+        self.seeds = seeds or THEME_SEEDS
+
+    def load_themes(self) -> List[Dict]:
+        session = self.db.get_session()
+        try:
+            rows = session.execute(text("SELECT id_theme, theme_name FROM THEME ORDER BY id_theme")).fetchall()
+            return [dict(row._mapping) for row in rows]
+        finally:
+            session.close()
+
+    def theme_centroids(self, themes: List[Dict]) -> np.ndarray:
+        """Centroide normalizado de las frases semilla de cada tema (un solo encode)"""
+        phrases, owners = [], []
+        for i, theme in enumerate(themes):
+            for phrase in self.seeds.get(theme['theme_name'], [theme['theme_name']]):
+                phrases.append(phrase)
+                owners.append(i)
+
+        embeddings = _normalize(np.asarray(self.pipeline.encode_texts(phrases), dtype=np.float32))
+        owners = np.asarray(owners)
+        centroids = np.zeros((len(themes), embeddings.shape[1]), dtype=np.float32)
+        np.add.at(centroids, owners, embeddings)
+        return _normalize(centroids)
+
+    def assign_all(self, paper_ids: Optional[List[int]] = None, threshold: float = 0.3,
+                   top_k: int = 2, replace: bool = True) -> int:
+        """Re-asignar temas a todos los papers con embedding (o a paper_ids)"""
+        themes = self.load_themes()
+        if not themes:
+            logger.warning("No hay temas disponibles. Ejecuta step4_setup_themes primero.")
+            return 0
+
+        ids, embeddings = self.db.get_embeddings(paper_ids)
+        if not len(ids):
+            logger.warning("No hay embeddings para clasificar")
+            return 0
+
+        centroids = self.theme_centroids(themes)
+        rows, theme_index, confidence = classify(embeddings, centroids, threshold, top_k)
+
+        theme_ids = np.array([theme['id_theme'] for theme in themes], dtype=np.int64)
+        assignments = list(zip(ids[rows].tolist(), theme_ids[theme_index].tolist(),
+                               np.round(confidence, 4).tolist()))
+
+        if replace:
+            written = self.db.replace_paper_themes(ids.tolist(), assignments)
+        else:
+            written = self.db.bulk_link_paper_themes(assignments)
+
+        logger.success(f"Temas asignados: {written} ({len(ids)} papers, {len(themes)} temas)")
+        return written
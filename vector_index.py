@@ -0,0 +1,288 @@
+"""
+Gestión incremental del índice FAISS
+Índice con IDs (id_paper) que permite añadir, actualizar y eliminar vectores
+sin reconstruir todo, con escritura atómica a disco.
+"""
+
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+import faiss
+import numpy as np
+from loguru import logger
+
+
+INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw')
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """Tipo de índice según el tamaño del corpus"""
+    if n_vectors < 20_000:
+        return 'flat'
+    if n_vectors < 1_000_000:
+        return 'ivf_flat'
+    return 'ivf_pq'
+
+
+def _nlist_for(n_vectors: int) -> int:
+    return max(1, min(65536, int(4 * math.sqrt(n_vectors))))
+
+
+def build_index(index_type: str, dimension: int, n_vectors: int,
+                hnsw_m: int = 32, pq_m: Optional[int] = None):
+    """
+    Crear un índice FAISS (sin entrenar) que acepta IDs propios.
+    Flat y HNSW van envueltos en IndexIDMap2; los IVF guardan los IDs en sus
+    listas invertidas con un direct map tipo hashtable (permite remove/reconstruct).
+    """
+    if index_type in ('ivf_flat', 'ivf_pq'):
+        quantizer = faiss.IndexFlatL2(dimension)
+        if index_type == 'ivf_flat':
+            index = faiss.IndexIVFFlat(quantizer, dimension, _nlist_for(n_vectors))
+        else:
+            pq_m = pq_m or next(m for m in (48, 32, 24, 16, 8, 4, 2, 1) if dimension % m == 0)
+            index = faiss.IndexIVFPQ(quantizer, dimension, _nlist_for(n_vectors), pq_m, 8)
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+
+    if index_type == 'flat':
+        inner = faiss.IndexFlatL2(dimension)
+    elif index_type == 'hnsw':
+        inner = faiss.IndexHNSWFlat(dimension, hnsw_m)
+    else:
+        raise ValueError(f"Tipo de índice desconocido: {index_type}")
+
+    return faiss.IndexIDMap2(inner)
+
+
+def _has_ids(index) -> bool:
+    return hasattr(index, 'id_map') or isinstance(index, faiss.IndexIVF)
+
+
+def index_type_of(index) -> str:
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return 'ivf_pq'
+    if isinstance(inner, faiss.IndexIVFFlat):
+        return 'ivf_flat'
+    if isinstance(inner, faiss.IndexHNSW):
+        return 'hnsw'
+    return 'flat'
+
+
+def train_index(index, vectors: np.ndarray, max_training_points: int = 100_000, seed: int = 42):
+    """Entrenar un índice IVF con una muestra de los vectores"""
+    if index.is_trained:
+        return
+    if len(vectors) > max_training_points:
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), max_training_points, replace=False)]
+    else:
+        sample = vectors
+    index.train(np.ascontiguousarray(sample, dtype='float32'))
+
+
+def set_search_params(index, nprobe: int = 16, ef_search: int = 64):
+    """Parámetros de búsqueda (IVF: nprobe, HNSW: efSearch)"""
+    index_type = index_type_of(index)
+    if index_type in ('ivf_flat', 'ivf_pq'):
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    elif index_type == 'hnsw':
+        faiss.downcast_index(index.index).hnsw.efSearch = ef_search
+
+
+def _atomic_write(path: Path, write_fn):
+    """Escribir en un temporal y renombrar sobre el destino"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    write_fn(str(tmp_path))
+    os.replace(tmp_path, path)
+
+
+class VectorIndexManager:
+    def __init__(self, index_path: str = "outputs/faiss_index.bin",
+                 mapping_path: str = "outputs/paper_id_mapping.json",
+                 dimension: int = 384):
+        self.index_path = Path(index_path)
+        self.mapping_path = Path(mapping_path)
+        self.dimension = dimension
+        self._index = None
+        self._lock = threading.RLock()
+
+    @property
+    def index(self):
+        """Índice cargado bajo demanda"""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self.load()
+        return self._index
+
+    def _new_index(self):
+        return build_index('flat', self.dimension, 0)
+
+    @property
+    def index_type(self) -> str:
+        return index_type_of(self.index)
+
+    def load(self):
+        """Cargar el índice desde disco (o crear uno vacío)"""
+        if not self.index_path.exists():
+            return self._new_index()
+
+        index = faiss.read_index(str(self.index_path))
+        self.dimension = index.d
+
+        if _has_ids(index):
+            set_search_params(index)
+            return index
+
+        # Índice plano antiguo: las posiciones se mapean con paper_id_mapping.json
+        logger.info("Convirtiendo índice FAISS antiguo a índice con IDs")
+        with open(self.mapping_path) as f:
+            paper_ids = np.asarray(json.load(f), dtype='int64')
+
+        vectors = index.reconstruct_n(0, index.ntotal)
+        converted = self._new_index()
+        converted.add_with_ids(vectors, paper_ids)
+        return converted
+
+    def __len__(self):
+        return self.index.ntotal
+
+    def ids(self) -> np.ndarray:
+        """IDs de papers presentes en el índice"""
+        index = self.index
+        if hasattr(index, 'id_map'):
+            return faiss.vector_to_array(index.id_map).astype('int64')
+        if isinstance(index, faiss.IndexIVF):
+            invlists = index.invlists
+            ids = [
+                faiss.rev_swig_ptr(invlists.get_ids(l), invlists.list_size(l)).copy()
+                for l in range(index.nlist) if invlists.list_size(l)
+            ]
+            return np.concatenate(ids).astype('int64') if ids else np.empty(0, dtype='int64')
+        return np.arange(index.ntotal, dtype='int64')
+
+    def remove(self, paper_ids: Iterable[int]) -> int:
+        """Eliminar vectores por id_paper"""
+        ids = np.asarray(list(paper_ids), dtype='int64')
+        if ids.size == 0:
+            return 0
+        with self._lock:
+            if self.index_type == 'hnsw':
+                return self._remove_by_rebuild(ids)
+            if isinstance(self.index, faiss.IndexIVF):
+                return self._remove_from_ivf(ids)
+            return self.index.remove_ids(faiss.IDSelectorBatch(ids))
+
+    def remove_range(self, start: int, stop: int) -> int:
+        """Eliminar vectores con id en [start, stop)"""
+        with self._lock:
+            if self.index_type == 'hnsw':
+                ids = self.ids()
+                return self._remove_by_rebuild(ids[(ids >= start) & (ids < stop)])
+            if isinstance(self.index, faiss.IndexIVF):
+                ids = self.ids()
+                return self._remove_from_ivf(ids[(ids >= start) & (ids < stop)])
+            return self.index.remove_ids(faiss.IDSelectorRange(int(start), int(stop)))
+
+    def _remove_from_ivf(self, ids: np.ndarray) -> int:
+        # El direct map hashtable solo admite IDSelectorArray de IDs existentes
+        ids = ids[np.isin(ids, self.ids())]
+        if ids.size == 0:
+            return 0
+        return self.index.remove_ids(faiss.IDSelectorArray(ids))
+
+    def _remove_by_rebuild(self, ids: np.ndarray) -> int:
+        # HNSW no soporta remove_ids: se reconstruye sin esos vectores
+        current = self.ids()
+        keep = ~np.isin(current, ids)
+        removed = int((~keep).sum())
+        if removed:
+            vectors = np.vstack([self.index.reconstruct(int(i)) for i in current[keep]]) \
+                if keep.any() else np.empty((0, self.dimension), dtype='float32')
+            self.rebuild(current[keep], vectors, index_type='hnsw')
+        return removed
+
+    def rebuild(self, paper_ids: Iterable[int], vectors, index_type: str = 'auto',
+                nprobe: int = 16, ef_search: int = 64):
+        """Reconstruir el índice completo con el tipo indicado (o según el tamaño)"""
+        ids = np.asarray(list(paper_ids), dtype='int64')
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        if index_type == 'auto':
+            index_type = choose_index_type(len(ids))
+
+        if vectors.ndim == 2 and vectors.shape[0]:
+            self.dimension = vectors.shape[1]
+        index = build_index(index_type, self.dimension, len(ids))
+        if len(ids):
+            train_index(index, vectors)
+            index.add_with_ids(vectors, ids)
+        set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+
+        with self._lock:
+            self._index = index
+        logger.info(f"Índice FAISS reconstruido: {index_type}, {len(ids)} vectores")
+        return index
+
+    def upsert(self, paper_ids: Iterable[int], vectors) -> int:
+        """Añadir o reemplazar vectores de los papers indicados"""
+        ids = np.asarray(list(paper_ids), dtype='int64')
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        if ids.size == 0:
+            return 0
+
+        with self._lock:
+            self.remove(ids)
+            self.index.add_with_ids(vectors, ids)
+        return int(ids.size)
+
+    add = upsert
+    update = upsert
+
+    def reconstruct(self, paper_id: int) -> Optional[np.ndarray]:
+        try:
+            return self.index.reconstruct(int(paper_id))
+        except RuntimeError:
+            return None
+
+    def search(self, vectors, k: int = 10):
+        """Buscar los k vecinos; devuelve (distancias, ids de paper)"""
+        vectors = np.ascontiguousarray(np.atleast_2d(vectors), dtype='float32')
+        return self.index.search(vectors, k)
+
+    def save(self):
+        """Guardar índice y mapping de forma atómica"""
+        with self._lock:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            index = self.index
+            _atomic_write(self.index_path, lambda p: faiss.write_index(index, p))
+
+            paper_ids = self.ids().tolist()
+
+            def write_mapping(p):
+                with open(p, 'w') as f:
+                    json.dump(paper_ids, f)
+
+            _atomic_write(self.mapping_path, write_mapping)
+
+        logger.success(f"Índice FAISS guardado: {len(paper_ids)} papers")
+
+
+if __name__ == "__main__":
+    import argparse
+    from mysql_database import MySQLManager
+
+    parser = argparse.ArgumentParser(description='Reconstruir el índice FAISS desde AI_SUMMARY')
+    parser.add_argument('--type', choices=('auto',) + INDEX_TYPES, default='auto')
+    args = parser.parse_args()
+
+    db = MySQLManager()
+    paper_ids, embeddings = db.get_embeddings()
+    manager = VectorIndexManager(dimension=embeddings.shape[1] if embeddings.size else 384)
+    manager.rebuild(paper_ids, embeddings, index_type=args.type)
+    manager.save()